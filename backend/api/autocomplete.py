@@ -0,0 +1,135 @@
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
+
+from recipes.models import Ingredient
+from . import reference_cache
+
+SIMILARITY_THRESHOLD = 0.3
+FUZZY_LIMIT = 10
+
+
+def get_trigrams(text):
+    """Триграммы слов строки, как в pg_trgm."""
+    trigrams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        trigrams.update(
+            padded[index:index + 3] for index in range(len(padded) - 2)
+        )
+    return trigrams
+
+
+class IngredientIndex:
+    """Индекс названий ингредиентов в памяти процесса.
+
+    Префиксный поиск выполняется бинарным поиском по отсортированным
+    названиям, нечёткий — по инвертированному индексу триграмм.
+    Индекс перестраивается при смене версии кеша ингредиентов.
+    """
+    def __init__(self):
+        self.version = None
+
+    def build(self, items):
+        self.names = sorted(
+            (item['name'].lower(), item['id']) for item in items
+        )
+        self.items = {item['id']: item for item in items}
+        self.trigrams = {}
+        self.postings = {}
+        for name, pk in self.names:
+            self.trigrams[pk] = get_trigrams(name)
+            for trigram in self.trigrams[pk]:
+                self.postings.setdefault(trigram, []).append(pk)
+
+    def refresh(self):
+        version, items, _, _ = reference_cache.ingredients.load()
+        if version != self.version:
+            self.build(items)
+            self.version = version
+
+    def search(self, query):
+        """Сначала совпадения по началу названия, затем по вхождению,
+        затем похожие по триграммам."""
+        self.refresh()
+        query = query.lower()
+        start = bisect_left(self.names, (query,))
+        prefix = []
+        for name, pk in self.names[start:]:
+            if not name.startswith(query):
+                break
+            prefix.append(pk)
+        found = set(prefix)
+        contains = [
+            pk for name, pk in self.names
+            if pk not in found and query in name
+        ]
+        found.update(contains)
+        return [
+            self.items[pk]
+            for pk in prefix + contains + self.similar(query, found)
+        ]
+
+    def similar(self, query, exclude):
+        query_trigrams = get_trigrams(query)
+        if not query_trigrams:
+            return []
+        overlap = Counter(
+            pk
+            for trigram in query_trigrams
+            for pk in self.postings.get(trigram, ())
+        )
+        scored = []
+        for pk, common in overlap.items():
+            if pk in exclude:
+                continue
+            similarity = common / (
+                len(query_trigrams) + len(self.trigrams[pk]) - common
+            )
+            if similarity >= SIMILARITY_THRESHOLD:
+                scored.append((-similarity, pk))
+        return [pk for _, pk in sorted(scored)[:FUZZY_LIMIT]]
+
+
+ingredient_index = IngredientIndex()
+
+
+def search_in_database(query):
+    """Поиск средствами PostgreSQL (pg_trgm).
+
+    Сравнивается название в нижнем регистре, как в индексе
+    в памяти. Использует индексы модели Ingredient по LOWER(name):
+    varchar_pattern_ops для префикса и GIN gin_trgm_ops
+    для вхождения и похожести.
+    """
+    query = query.lower()
+    return list(
+        Ingredient.objects.annotate(
+            lower_name=Lower('name')
+        ).filter(
+            Q(lower_name__startswith=query)
+            | Q(lower_name__contains=query)
+            | Q(lower_name__trigram_similar=query)
+        ).annotate(
+            rank=Case(
+                When(lower_name__startswith=query, then=Value(0)),
+                When(lower_name__contains=query, then=Value(1)),
+                default=Value(2),
+                output_field=IntegerField()
+            ),
+            similarity=TrigramSimilarity('lower_name', query)
+        ).order_by(
+            'rank', '-similarity', 'name'
+        ).values('id', 'name', 'measurement_unit')
+    )
+
+
+def search_ingredients(query):
+    """Автодополнение ингредиентов выбранным бэкендом."""
+    if settings.INGREDIENT_AUTOCOMPLETE == 'database':
+        return search_in_database(query)
+    return ingredient_index.search(query)
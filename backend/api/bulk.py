@@ -0,0 +1,94 @@
+from django.db import transaction
+
+from recipes import feed
+from recipes.models import Cart, Favorite, Recipe, ShoppingListExport
+from users.models import Follow
+from . import conditional, response_cache
+from .pagination import bump_count_version
+
+
+def raw_delete(queryset):
+    """Удаление одним запросом DELETE, без выборки объектов.
+
+    Сигналы post_delete при этом не отправляются: их действия
+    (счётчики рецептов, выгрузки, лента, версии кешей) вызывающий
+    код выполняет один раз для всей пачки.
+    """
+    return queryset._raw_delete(queryset.db)
+
+
+def user_state_changed(user):
+    """Сброс версии состояния пользователя для условных запросов."""
+    transaction.on_commit(
+        lambda: response_cache.invalidate(
+            conditional.user_state_tag(user.id)
+        )
+    )
+
+
+def recipes_changed(model, user, recipe_ids):
+    """Обновление связанных данных после массового изменения.
+
+    bulk_create и raw_delete не отправляют сигналы, поэтому
+    их действия выполняются здесь один раз для всех рецептов.
+    """
+    Recipe.objects.filter(id__in=recipe_ids).recount_stats()
+    if model is Cart:
+        ShoppingListExport.objects.filter(user=user).delete()
+    if model is Favorite:
+        transaction.on_commit(
+            lambda: response_cache.invalidate(
+                response_cache.RECIPE_POPULARITY
+            )
+        )
+    bump_count_version('recipes', user.id)
+    user_state_changed(user)
+
+
+@transaction.atomic
+def add_recipes(model, user, recipe_ids):
+    """Добавление рецептов в избранное/корзину.
+
+    Уже добавленные рецепты пропускаются на уровне
+    ограничения уникальности, без предварительной проверки.
+    """
+    model.objects.bulk_create(
+        [model(user=user, recipe_id=recipe_id) for recipe_id in recipe_ids],
+        ignore_conflicts=True
+    )
+    recipes_changed(model, user, recipe_ids)
+
+
+@transaction.atomic
+def remove_recipes(model, user, recipe_ids):
+    """Удаление рецептов из избранного/корзины."""
+    deleted = raw_delete(
+        model.objects.filter(user=user, recipe_id__in=recipe_ids)
+    )
+    if deleted:
+        recipes_changed(model, user, recipe_ids)
+    return deleted
+
+
+@transaction.atomic
+def add_followings(user, author_ids):
+    """Подписка на авторов с заполнением ленты."""
+    Follow.objects.bulk_create(
+        [Follow(user=user, following_id=author_id)
+         for author_id in author_ids],
+        ignore_conflicts=True
+    )
+    feed.backfill(user.id, author_ids)
+    user_state_changed(user)
+
+
+@transaction.atomic
+def remove_followings(user, author_ids):
+    """Отписка от авторов с очисткой ленты."""
+    deleted = raw_delete(
+        Follow.objects.filter(user=user, following_id__in=author_ids)
+    )
+    if deleted:
+        feed.trim(user.id, author_ids)
+        user_state_changed(user)
+    return deleted
@@ -0,0 +1,93 @@
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+from . import response_cache
+
+# Валидаторы строятся только из версий, которые уже хранятся
+# в кеше (теги api.response_cache, версии справочников), без
+# запросов к БД. Версия - время изменения в нс, поэтому по ним
+# считается и Last-Modified.
+USERS = 'users'
+PUBLIC_CACHE_CONTROL = 'no-cache'
+PRIVATE_CACHE_CONTROL = 'private, no-cache'
+
+
+def user_state_tag(pk):
+    """Избранное, корзина и подписки пользователя."""
+    return f'user-state:{pk}'
+
+
+class Validators:
+    """ETag, Last-Modified и Cache-Control ответа.
+
+    versions - версии, от которых зависит ответ, parts - прочие
+    значения для ETag. При personal для пользователя учитывается
+    версия его избранного, корзины и подписок.
+    """
+    def __init__(self, request, versions, parts=(), personal=True,
+                 cache_control=None):
+        self.request = request
+        self.personal = personal
+        versions = list(versions)
+        user = request.user
+        if personal and user.is_authenticated:
+            versions += response_cache.get_versions([user_state_tag(user.id)])
+            parts = (*parts, user.id)
+            cache_control = cache_control or PRIVATE_CACHE_CONTROL
+        self.cache_control = cache_control or PUBLIC_CACHE_CONTROL
+        self.etag = quote_etag(md5(repr((
+            response_cache.get_key(request), *parts, *versions
+        )).encode()).hexdigest())
+        self.last_modified = int(max(versions) / 1e9) if versions else None
+
+    def apply(self, response):
+        response['ETag'] = self.etag
+        if self.last_modified is not None:
+            response['Last-Modified'] = http_date(self.last_modified)
+        response['Cache-Control'] = self.cache_control
+        if self.personal:
+            patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def not_modified(self):
+        """Ответ 304 или 412, если копия клиента актуальна, иначе None."""
+        response = get_conditional_response(
+            self.request._request,
+            etag=self.etag,
+            last_modified=self.last_modified
+        )
+        return response and self.apply(response)
+
+
+def conditional_response(request, get_response, versions, parts=(),
+                         personal=True, cache_control=None):
+    """Проверка условного запроса до формирования ответа.
+
+    Если копия клиента актуальна, get_response не вызывается.
+    """
+    validators = Validators(
+        request, versions, parts, personal, cache_control
+    )
+    if response := validators.not_modified():
+        return response
+    response = get_response()
+    if response.status_code == status.HTTP_200_OK:
+        validators.apply(response)
+    return response
+
+
+def validated_response(request, response, versions, started=None):
+    """Проверка условного запроса по уже сформированному ответу.
+
+    Версия новее started означает изменение во время формирования
+    ответа: данные могли устареть, поэтому валидаторы не выдаются.
+    """
+    if response.status_code != status.HTTP_200_OK or (
+        started is not None and versions and max(versions) >= started
+    ):
+        return response
+    validators = Validators(request, versions)
+    return validators.not_modified() or validators.apply(response)
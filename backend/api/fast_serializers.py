@@ -0,0 +1,110 @@
+from abc import ABC, abstractmethod
+
+from recipes.models import Recipe
+from .profiling import current_metrics
+from .serializers import get_srcset
+
+IMAGE_STORAGE = Recipe._meta.get_field('image').storage
+
+
+class FastSerializer(ABC):
+    """Сериализатор только для чтения без полей DRF.
+
+    Поддерживает ту часть интерфейса сериализатора, которую
+    используют вьюсеты при чтении: instance, many, context и data.
+    Вывод совпадает с соответствующим сериализатором DRF побайтно,
+    проверка - тесты api.tests.test_fast_serializers и команда
+    benchmark_serializers.
+    """
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @property
+    def data(self):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return self.serialize()
+        with metrics.serializer_timer():
+            return self.serialize()
+
+    def serialize(self):
+        if self.many:
+            return [self.to_representation(item) for item in self.instance]
+        return self.to_representation(self.instance)
+
+    @abstractmethod
+    def to_representation(self, instance):
+        """Словарь с данными одного объекта."""
+
+
+class FastRecipeSerializer(FastSerializer):
+    """Быстрый аналог RecipeGetSerializer для списка, рецепта и ленты.
+
+    Рецепты должны быть выбраны с select_related('author') и
+    prefetch_related тегов и recipe_ingredient__ingredient.
+    Состояние пользователя (is_favorited, is_in_shopping_cart,
+    is_subscribed) берётся из аннотаций, иначе False, и
+    подставляется после сериализации (api.user_state).
+    """
+    def to_representation(self, recipe):
+        request = self.context.get('request')
+        author = recipe.author
+        image = srcset = None
+        if recipe.image_variants is not None:
+            srcset = get_srcset(recipe.image_variants, request)
+        if recipe.image:
+            image = IMAGE_STORAGE.url(recipe.image.name)
+            if request is not None:
+                image = request.build_absolute_uri(image)
+        return {
+            'id': recipe.id,
+            'tags': [
+                {
+                    'id': tag.id,
+                    'name': str(tag.name),
+                    'color': str(tag.color),
+                    'slug': str(tag.slug),
+                }
+                for tag in recipe.tags.all()
+            ],
+            'author': {
+                'email': str(author.email),
+                'id': author.id,
+                'username': str(author.username),
+                'first_name': str(author.first_name),
+                'last_name': str(author.last_name),
+                'is_subscribed': getattr(author, 'is_subscribed', False),
+            },
+            'ingredients': [
+                {
+                    'id': recipe_ingredient.ingredient.id,
+                    'name': str(recipe_ingredient.ingredient.name),
+                    'measurement_unit': str(
+                        recipe_ingredient.ingredient.measurement_unit
+                    ),
+                    'amount': int(recipe_ingredient.amount),
+                }
+                for recipe_ingredient in recipe.recipe_ingredient.all()
+            ],
+            'is_favorited': bool(getattr(recipe, 'is_favorited', False)),
+            'is_in_shopping_cart': bool(
+                getattr(recipe, 'is_in_shopping_cart', False)
+            ),
+            'name': str(recipe.name),
+            'image': image,
+            'image_srcset': srcset,
+            'text': str(recipe.text),
+            'cooking_time': int(recipe.cooking_time),
+        }
+
+
+class FastIngredientSerializer(FastSerializer):
+    """Быстрый аналог IngredientSerializer."""
+    def to_representation(self, ingredient):
+        return {
+            'id': ingredient.id,
+            'name': str(ingredient.name),
+            'measurement_unit': str(ingredient.measurement_unit),
+        }
@@ -1,29 +1,70 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import Exists, F, OuterRef, Q
+from django.db.models.functions import Lower
 from django_filters import rest_framework
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import (
+    SEARCH_CONFIG, Cart, Favorite, Ingredient, Recipe, RecipeIngredient
+)
+from .reference_cache import get_tag_choices, get_tag_ids
 
 
 class IngredientSearchFilter(rest_framework.FilterSet):
     """Фильтрация для модели ингредиентов."""
-    name = rest_framework.CharFilter(lookup_expr='istartswith')
+    name = rest_framework.CharFilter(method='filter_name')
 
     class Meta:
         model = Ingredient
         fields = ['name']
 
+    def filter_name(self, queryset, name, value):
+        """Начало названия без учёта регистра, по индексу LOWER(name)."""
+        return queryset.annotate(
+            lower_name=Lower('name')
+        ).filter(lower_name__startswith=value.lower())
+
+
+class RecipeOrderingFilter(rest_framework.OrderingFilter):
+    """Сортировка рецептов с добавлением id для стабильного порядка.
+
+    id сортируется в направлении первого поля, поэтому каждому
+    режиму в обе стороны, в том числе с фильтром по автору,
+    соответствует составной индекс модели Recipe. Фильтр по тегам
+    проверяется полусоединением по уникальному индексу таблицы
+    связей для строк, прочитанных в порядке индекса сортировки.
+    """
+    def filter(self, qs, value):
+        qs = super().filter(qs, value)
+        if value:
+            ordering = qs.query.order_by
+            qs = qs.order_by(
+                *ordering, '-id' if ordering[0].startswith('-') else 'id'
+            )
+        return qs
+
 
 class RecipeSearchFilter(rest_framework.FilterSet):
     """Фильтрация для модели рецептов."""
-    is_favorited = rest_framework.BooleanFilter()
-    is_in_shopping_cart = rest_framework.BooleanFilter()
+    search = rest_framework.CharFilter(method='filter_search')
+    is_favorited = rest_framework.BooleanFilter(method='filter_user_recipes')
+    is_in_shopping_cart = rest_framework.BooleanFilter(
+        method='filter_user_recipes'
+    )
     author = rest_framework.NumberFilter(
         field_name='author__id'
     )
-    tags = rest_framework.ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        to_field_name='slug',
+    tags = rest_framework.MultipleChoiceFilter(
         label='tags',
-        queryset=Tag.objects.all()
+        choices=get_tag_choices,
+        method='filter_tags'
+    )
+    ordering = RecipeOrderingFilter(
+        fields=(
+            ('favorites_count', 'popularity'),
+            ('cooking_time', 'cooking_time'),
+            ('created', 'created'),
+        )
     )
 
     class Meta:
@@ -34,3 +75,60 @@ class RecipeSearchFilter(rest_framework.FilterSet):
             'author',
             'tags'
         ]
+
+    def filter_user_recipes(self, queryset, name, value):
+        """Рецепты в избранном/корзине пользователя (или вне их).
+
+        Проверка выполняется полусоединением в WHERE, только
+        когда параметр передан. У анонима избранного и корзины нет.
+        """
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset if not value else queryset.none()
+        model = Favorite if name == 'is_favorited' else Cart
+        in_user_recipes = Exists(
+            model.objects.filter(user=user, recipe_id=OuterRef('pk'))
+        )
+        return queryset.filter(in_user_recipes if value else ~in_user_recipes)
+
+    def filter_tags(self, queryset, name, value):
+        """Рецепты хотя бы с одним из тегов.
+
+        Полусоединение с таблицей связей не дублирует строки
+        и не требует DISTINCT, слаги берутся из кеша тегов.
+        """
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe_id=OuterRef('pk'),
+                    tag_id__in=get_tag_ids(value)
+                )
+            )
+        )
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск с ранжированием по релевантности.
+
+        Без явного параметра ordering результаты сортируются по рангу.
+        Вне PostgreSQL используется поиск по вхождению подстроки.
+        """
+        if connection.vendor != 'postgresql':
+            return queryset.filter(
+                Q(name__icontains=value)
+                | Q(text__icontains=value)
+                | Exists(
+                    RecipeIngredient.objects.filter(
+                        recipe_id=OuterRef('pk'),
+                        ingredient__name__icontains=value
+                    )
+                )
+            )
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        queryset = queryset.filter(search_vector=query)
+        if self.data.get('ordering'):
+            return queryset
+        return queryset.annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', '-id')
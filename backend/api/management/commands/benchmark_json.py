@@ -0,0 +1,119 @@
+import base64
+import datetime
+import decimal
+import io
+import os
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import FastRecipeSerializer
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+from api.views import RecipeViewSet
+
+
+class Command(BaseCommand):
+    help = ('Сравнение FastJSONRenderer/FastJSONParser со стандартными '
+            'JSONRenderer/JSONParser: совпадение результата и скорость.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=50)
+        parser.add_argument(
+            '--image-size',
+            type=int,
+            default=2048,
+            help='Размер изображения в теле запроса, КБ.'
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--host', default='localhost')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING('orjson не установлен, '
+                                   'сравнивается запасной вариант.')
+            )
+        request = Request(
+            APIRequestFactory().get('/api/recipes/', HTTP_HOST=options['host'])
+        )
+        page = {
+            'count': options['recipes'],
+            'next': None,
+            'previous': None,
+            'results': FastRecipeSerializer(
+                RecipeViewSet.queryset[:options['recipes']],
+                many=True,
+                context={'request': request}
+            ).data,
+        }
+        special = {
+            'decimal': decimal.Decimal('12.50'),
+            'aware': timezone.now(),
+            'naive': datetime.datetime(2024, 1, 2, 3, 4, 5, 6),
+            'date': datetime.date(2024, 1, 2),
+            'time': datetime.time(12, 30),
+            'duration': datetime.timedelta(minutes=90),
+            'lazy': gettext_lazy('Рецепт'),
+            'uuid': uuid.uuid4(),
+            'separators': 'a\u2028b\u2029c',
+            1: 'int key',
+        }
+        self.check_renderers(page, special)
+        self.compare(
+            'рендеринг страницы',
+            lambda: JSONRenderer().render(page),
+            lambda: FastJSONRenderer().render(page),
+            options['repeat']
+        )
+        image = base64.b64encode(
+            os.urandom(options['image_size'] * 1024)
+        ).decode()
+        body = JSONRenderer().render({
+            'name': 'Рецепт', 'image': f'data:image/png;base64,{image}'
+        })
+        if JSONParser().parse(io.BytesIO(body)) != FastJSONParser().parse(
+            io.BytesIO(body)
+        ):
+            raise CommandError('Результаты разбора различаются.')
+        self.compare(
+            'разбор тела с изображением',
+            lambda: JSONParser().parse(io.BytesIO(body)),
+            lambda: FastJSONParser().parse(io.BytesIO(body)),
+            options['repeat']
+        )
+
+    def check_renderers(self, *payloads):
+        for payload in payloads:
+            expected = JSONRenderer().render(payload)
+            actual = FastJSONRenderer().render(payload)
+            if expected != actual:
+                raise CommandError(
+                    f'Вывод различается:\n{expected!r}\n{actual!r}'
+                )
+        self.stdout.write('Вывод рендереров совпадает.')
+
+    def measure(self, function, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def compare(self, name, standard, fast, repeat):
+        standard_time = self.measure(standard, repeat)
+        fast_time = self.measure(fast, repeat)
+        self.stdout.write(
+            f'{name}: стандартный {standard_time:.2f} мс, '
+            f'orjson {fast_time:.2f} мс, '
+            f'в {standard_time / fast_time:.1f} раза быстрее'
+        )
@@ -0,0 +1,94 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, OuterRef
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.fast_serializers import FastIngredientSerializer, FastRecipeSerializer
+from api.serializers import IngredientSerializer, RecipeGetSerializer
+from api.views import RecipeViewSet
+from recipes.models import Cart, Favorite, Ingredient
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = ('Проверка побайтного совпадения быстрых сериализаторов '
+            'с сериализаторами DRF и сравнение их скорости.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--host',
+            default='localhost',
+            help='Хост для абсолютных ссылок (из ALLOWED_HOSTS).'
+        )
+
+    def handle(self, *args, **options):
+        request = Request(
+            APIRequestFactory().get('/api/recipes/', HTTP_HOST=options['host'])
+        )
+        context = {'request': request, 'user_state': False}
+        recipes = RecipeViewSet.queryset[:options['recipes']]
+        cases = [
+            ('рецепты', RecipeGetSerializer, FastRecipeSerializer,
+             list(recipes)),
+            ('ингредиенты', IngredientSerializer, FastIngredientSerializer,
+             list(Ingredient.objects.all())),
+        ]
+        if user := User.objects.filter(favorite_recipe__isnull=False).first():
+            cases.append((
+                'рецепты с аннотациями',
+                RecipeGetSerializer,
+                FastRecipeSerializer,
+                list(recipes.annotate(
+                    is_favorited=Exists(Favorite.objects.filter(
+                        user=user, recipe=OuterRef('pk')
+                    )),
+                    is_in_shopping_cart=Exists(Cart.objects.filter(
+                        user=user, recipe=OuterRef('pk')
+                    ))
+                ))
+            ))
+        for name, serializer, fast_serializer, objects in cases:
+            self.check_parity(name, serializer, fast_serializer,
+                              objects, context)
+            self.compare_speed(name, serializer, fast_serializer,
+                               objects, context, options['repeat'])
+
+    def check_parity(self, name, serializer, fast_serializer,
+                     objects, context):
+        """Побайтное сравнение JSON для каждого объекта."""
+        renderer = JSONRenderer()
+        mismatched = [
+            obj.pk for obj in objects
+            if renderer.render(serializer(obj, context=context).data)
+            != renderer.render(fast_serializer(obj, context=context).data)
+        ]
+        if mismatched:
+            raise CommandError(
+                f'{name}: вывод различается для id '
+                f'{", ".join(map(str, mismatched[:20]))}'
+            )
+        self.stdout.write(f'{name}: вывод совпадает ({len(objects)} шт.)')
+
+    def measure(self, serializer, objects, context, repeat):
+        """Лучшее время сериализации списка, мс."""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            serializer(objects, many=True, context=context).data
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def compare_speed(self, name, serializer, fast_serializer,
+                      objects, context, repeat):
+        slow = self.measure(serializer, objects, context, repeat)
+        fast = self.measure(fast_serializer, objects, context, repeat)
+        self.stdout.write(
+            f'{name}: DRF {slow:.1f} мс, быстрый {fast:.1f} мс, '
+            f'в {slow / fast if fast else 0:.1f} раза быстрее'
+        )
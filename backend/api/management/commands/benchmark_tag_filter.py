@@ -0,0 +1,113 @@
+import time
+from itertools import combinations
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.filters import RecipeSearchFilter
+from api.management.commands.seed_benchmark_data import TAG_PREFIX
+from recipes.models import Recipe, Tag
+
+
+class Command(BaseCommand):
+    help = ('Сравнение фильтрации рецептов по нескольким тегам: '
+            'join с DISTINCT против полусоединения. Данные создаются '
+            'командой seed_benchmark_data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recipes',
+            type=int,
+            default=1_000_000,
+            help='Сколько рецептов набора должно быть в БД перед замером.'
+        )
+        parser.add_argument(
+            '--tags',
+            type=int,
+            default=6,
+            help='Количество тегов в наборе данных.'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Количество повторов каждого запроса.'
+        )
+        parser.add_argument(
+            '--explain',
+            action='store_true',
+            help='Вывести план запросов.'
+        )
+        parser.add_argument(
+            '--confirm',
+            action='store_true',
+            help='Подтверждение записи синтетических данных в БД.'
+        )
+        parser.add_argument(
+            '--cleanup',
+            action='store_true',
+            help='Удалить данные набора после замера.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['confirm']:
+            raise CommandError(
+                f'Команда создаёт до {options["recipes"]} синтетических '
+                f'рецептов в БД {connection.settings_dict["NAME"]}. '
+                'Запустите с --confirm.'
+            )
+        call_command(
+            'seed_benchmark_data',
+            recipes=options['recipes'],
+            tags=options['tags'],
+            ingredients_per_recipe=0,
+            favorites_per_user=0,
+            carts_per_user=0,
+            follows_per_user=0,
+            stdout=self.stdout
+        )
+        slugs = list(
+            Tag.objects.filter(
+                slug__startswith=TAG_PREFIX
+            ).values_list('slug', flat=True)
+        )
+        try:
+            for size in (2, 3):
+                for selected in list(combinations(slugs, size))[:3]:
+                    self.compare(list(selected), options)
+        finally:
+            if options['cleanup']:
+                call_command(
+                    'seed_benchmark_data', cleanup=True, stdout=self.stdout
+                )
+
+    def measure(self, queryset, repeat):
+        """Лучшее время подсчёта и выборки первой страницы, мс."""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset.count()
+            list(queryset.values_list('id', flat=True)[:10])
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def compare(self, slugs, options):
+        join_queryset = Recipe.objects.filter(
+            tags__slug__in=slugs
+        ).distinct()
+        semi_join_queryset = RecipeSearchFilter(
+            {'tags': slugs}, queryset=Recipe.objects.all()
+        ).qs
+        join_time = self.measure(join_queryset, options['repeat'])
+        semi_join_time = self.measure(semi_join_queryset, options['repeat'])
+        self.stdout.write(
+            f'{",".join(slugs)}: join+DISTINCT {join_time:.1f} мс, '
+            f'полусоединение {semi_join_time:.1f} мс'
+        )
+        if options['explain'] and connection.vendor == 'postgresql':
+            for queryset in (join_queryset, semi_join_queryset):
+                self.stdout.write(
+                    queryset.values('id')[:10].explain(analyze=True)
+                )
@@ -0,0 +1,168 @@
+import csv
+import io
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api import reference_cache
+from recipes.models import Ingredient
+
+BATCH_SIZE = 50_000
+READ_SIZE = 64 * 1024
+MAX_LENGTH = 200
+STAGING_TABLE = 'ingredient_staging'
+
+
+def read_csv(file):
+    """Строки CSV: название, единица измерения."""
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def read_json(file):
+    """Потоковое чтение массива JSON или JSON Lines.
+
+    Объекты разбираются по одному из буфера, поэтому файл
+    не загружается в память целиком.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n[],':
+            position += 1
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                if buffer[position:].strip():
+                    raise CommandError('Некорректный JSON.')
+                return
+            chunk = file.read(READ_SIZE)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item['name'], item['measurement_unit']
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+}
+
+
+class Command(BaseCommand):
+    help = ('Загрузка ингредиентов из CSV/JSON. Дубликаты по '
+            '(название, единица) пропускаются, повторный запуск '
+            'ничего не меняет.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format',
+            choices=tuple(READERS),
+            help='По умолчанию определяется по расширению файла.'
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(
+                f'Неизвестный формат: {file_format or path.name}.'
+            )
+        self.started = time.perf_counter()
+        self.read = self.skipped = 0
+        load = (
+            self.load_postgresql if connection.vendor == 'postgresql'
+            else self.load_bulk_create
+        )
+        with open(path, encoding='utf-8', newline='') as file:
+            with transaction.atomic():
+                created = load(
+                    self.batches(READERS[file_format](file),
+                                 options['batch_size'])
+                )
+                transaction.on_commit(reference_cache.ingredients.invalidate)
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано строк: {self.read}, пропущено: {self.skipped}, '
+            f'создано ингредиентов: {created} '
+            f'за {time.perf_counter() - self.started:.1f} с'
+        ))
+
+    def batches(self, rows, batch_size):
+        """Пачки уникальных (название, единица) без пустых значений."""
+        seen = set()
+        batch = []
+        for name, measurement_unit in rows:
+            self.read += 1
+            row = (name.strip(), measurement_unit.strip())
+            if (
+                not all(row)
+                or max(map(len, row)) > MAX_LENGTH
+                or row in seen
+            ):
+                self.skipped += 1
+                continue
+            seen.add(row)
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def progress(self):
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(
+            f'Обработано строк: {self.read} '
+            f'({self.read / elapsed:.0f} строк/с)'
+        )
+
+    def load_postgresql(self, batches):
+        """COPY во временную таблицу и INSERT ... ON CONFLICT."""
+        table = connection.ops.quote_name(Ingredient._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {STAGING_TABLE} '
+                f'(name varchar({MAX_LENGTH}), '
+                f'measurement_unit varchar({MAX_LENGTH})) '
+                f'ON COMMIT DROP'
+            )
+            for batch in batches:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f'COPY {STAGING_TABLE} FROM STDIN WITH (FORMAT csv)',
+                    buffer
+                )
+                self.progress()
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                f'SELECT name, measurement_unit FROM {STAGING_TABLE} '
+                f'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+            return cursor.rowcount
+
+    def load_bulk_create(self, batches):
+        """Запасной вариант для СУБД без COPY."""
+        before = Ingredient.objects.count()
+        for batch in batches:
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in batch
+                ),
+                batch_size=1_000,
+                ignore_conflicts=True
+            )
+            self.progress()
+        return Ingredient.objects.count() - before
@@ -0,0 +1,106 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.models import ShoppingListExport
+from api.shopping_list import process_export
+
+logger = logging.getLogger(__name__)
+
+# Подробности ошибки пишутся в лог, пользователю - общее сообщение.
+EXPORT_ERROR = 'Не удалось сформировать файл, создайте выгрузку заново.'
+
+
+class Command(BaseCommand):
+    help = 'Формирование файлов списков покупок из очереди задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать очередь один раз и завершиться.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между опросами пустой очереди, в секундах.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help='Количество задач, забираемых за один раз.'
+        )
+        parser.add_argument(
+            '--cleanup-interval',
+            type=float,
+            default=300.0,
+            help='Пауза между удалениями устаревших выгрузок, в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        next_cleanup = 0
+        while True:
+            if time.monotonic() >= next_cleanup:
+                removed = self.remove_expired()
+                if removed:
+                    self.stdout.write(f'Удалено выгрузок: {removed}')
+                next_cleanup = time.monotonic() + options['cleanup_interval']
+            processed = self.process_batch(options['batch_size'])
+            if processed:
+                self.stdout.write(f'Обработано задач: {processed}')
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
+
+    def process_batch(self, batch_size):
+        """Обработка пачки задач.
+        Строки блокируются, чтобы несколько воркеров не брали одну задачу."""
+        with transaction.atomic():
+            exports = list(
+                ShoppingListExport.objects.select_for_update(
+                    skip_locked=True
+                ).filter(
+                    status=ShoppingListExport.PENDING
+                ).select_related('user')[:batch_size]
+            )
+            for export in exports:
+                try:
+                    with transaction.atomic():
+                        process_export(export)
+                except Exception:
+                    logger.exception(
+                        'Не удалось сформировать выгрузку %s', export.id
+                    )
+                    export.status = ShoppingListExport.FAILED
+                    export.error = EXPORT_ERROR
+                    export.save(update_fields=['status', 'error'])
+        return len(exports)
+
+    def remove_expired(self):
+        """Удаление завершённых задач старше SHOPPING_LIST_EXPORT_TTL.
+        Файл удаляется, если на него не ссылаются другие задачи:
+        одинаковые списки покупок делят один файл."""
+        expired = ShoppingListExport.objects.filter(
+            created__lt=timezone.now() - timedelta(
+                seconds=settings.SHOPPING_LIST_EXPORT_TTL
+            )
+        ).exclude(status=ShoppingListExport.PENDING)
+        names = set(expired.exclude(file='').values_list('file', flat=True))
+        removed = expired.delete()[0]
+        names -= set(
+            ShoppingListExport.objects.filter(
+                file__in=names
+            ).values_list('file', flat=True)
+        )
+        for name in names:
+            default_storage.delete(name)
+        return removed
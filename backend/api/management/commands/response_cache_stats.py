@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from api import response_cache
+
+
+class Command(BaseCommand):
+    help = 'Попадания и промахи кеша ответов анонимным пользователям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Обнулить счётчики после вывода.'
+        )
+
+    def handle(self, *args, **options):
+        metrics = response_cache.get_metrics()
+        hits = metrics[response_cache.HIT]
+        misses = metrics[response_cache.MISS]
+        total = hits + misses
+        ratio = hits / total * 100 if total else 0
+        self.stdout.write(
+            f'Попаданий: {hits}, промахов: {misses}, '
+            f'доля попаданий: {ratio:.1f}%'
+        )
+        if options['reset']:
+            response_cache.reset_metrics()
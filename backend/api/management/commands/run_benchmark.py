@@ -0,0 +1,260 @@
+import json
+import logging
+import math
+import random
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.management.commands.seed_benchmark_data import USER_PREFIX
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = ('Прогон смеси запросов к API внутри процесса: перцентили '
+            'времени ответа и число SQL-запросов по сценариям.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1_000)
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            help='Запустить только указанные сценарии.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--host',
+            default='localhost',
+            help='Значение заголовка Host (из ALLOWED_HOSTS).'
+        )
+        parser.add_argument(
+            '--output',
+            help='Сохранить результаты в JSON для сравнения.'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON предыдущего прогона для поиска регрессий.'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=20,
+            help='Допустимый рост p95, %%.'
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.prepare(options)
+        scenarios = self.get_scenarios()
+        if options['scenario']:
+            unknown = set(options['scenario']) - set(scenarios)
+            if unknown:
+                raise CommandError(
+                    f'Неизвестные сценарии: {", ".join(sorted(unknown))}'
+                )
+            scenarios = {
+                name: scenarios[name] for name in options['scenario']
+            }
+        names = list(scenarios)
+        weights = [scenarios[name][0] for name in names]
+        timings = defaultdict(list)
+        queries = defaultdict(list)
+        profiling_logger = logging.getLogger('api.profiling')
+        level = profiling_logger.level
+        profiling_logger.setLevel(logging.ERROR)
+        try:
+            for number in range(options['warmup'] + options['requests']):
+                name = self.random.choices(names, weights)[0]
+                elapsed, count = self.run_request(scenarios[name][1])
+                if number >= options['warmup']:
+                    timings[name].append(elapsed)
+                    queries[name].append(count)
+        finally:
+            profiling_logger.setLevel(level)
+        results = {
+            name: {
+                'requests': len(timings[name]),
+                **{
+                    f'p{percent}': round(
+                        percentile(timings[name], percent), 2
+                    )
+                    for percent in PERCENTILES
+                },
+                'queries_avg': round(
+                    sum(queries[name]) / len(queries[name]), 2
+                ),
+                'queries_max': max(queries[name]),
+            }
+            for name in names if timings[name]
+        }
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'])
+
+    def prepare(self, options):
+        """Клиенты с токенами и выборки идентификаторов для запросов."""
+        users = list(
+            User.objects.filter(
+                username__startswith=USER_PREFIX
+            )[:options['users']]
+        )
+        if not users:
+            raise CommandError(
+                'Нет данных, сначала выполните seed_benchmark_data.'
+            )
+        self.clients = []
+        for user in users:
+            client = APIClient(HTTP_HOST=options['host'])
+            token, _ = Token.objects.get_or_create(user=user)
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+            self.clients.append(client)
+        self.anonymous = APIClient(HTTP_HOST=options['host'])
+        self.recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+        self.tag_slugs = list(Tag.objects.values_list('slug', flat=True))
+        self.ingredient_names = list(
+            Ingredient.objects.values_list('name', flat=True)
+        )
+
+    def get_scenarios(self):
+        """Сценарии: имя -> (вес в смеси, функция запроса)."""
+        return {
+            'recipe_list': (30, self.recipe_list),
+            'recipe_list_tags': (15, self.recipe_list_tags),
+            'recipe_list_user': (10, self.recipe_list_user),
+            'recipe_detail': (15, self.recipe_detail),
+            'ingredient_autocomplete': (20, self.ingredient_autocomplete),
+            'subscriptions': (7, self.subscriptions),
+            'download_shopping_cart': (3, self.download_shopping_cart),
+        }
+
+    def run_request(self, request):
+        """Время ответа (мс) с чтением тела и число SQL-запросов."""
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = request()
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{response.request["PATH_INFO"]}: '
+                f'ответ {response.status_code}'
+            )
+        return elapsed, len(context)
+
+    def user_client(self):
+        return self.random.choice(self.clients)
+
+    def recipe_list(self):
+        return self.anonymous.get(
+            '/api/recipes/',
+            {'page': self.random.randint(1, 5), 'limit': 6}
+        )
+
+    def recipe_list_tags(self):
+        return self.anonymous.get(
+            '/api/recipes/',
+            {
+                'tags': self.random.sample(
+                    self.tag_slugs, min(2, len(self.tag_slugs))
+                ),
+                'limit': 6
+            }
+        )
+
+    def recipe_list_user(self):
+        return self.user_client().get(
+            '/api/recipes/',
+            {
+                self.random.choice(
+                    ('is_favorited', 'is_in_shopping_cart')
+                ): 1,
+                'limit': 6
+            }
+        )
+
+    def recipe_detail(self):
+        return self.user_client().get(
+            f'/api/recipes/{self.random.choice(self.recipe_ids)}/'
+        )
+
+    def ingredient_autocomplete(self):
+        name = self.random.choice(self.ingredient_names)
+        return self.anonymous.get(
+            '/api/ingredients/',
+            {'name': name[:self.random.randint(1, 4)]}
+        )
+
+    def subscriptions(self):
+        return self.user_client().get(
+            '/api/users/subscriptions/',
+            {'limit': 6, 'recipes_limit': 3}
+        )
+
+    def download_shopping_cart(self):
+        return self.user_client().get(
+            '/api/recipes/download_shopping_cart/',
+            {'format': self.random.choice(('txt', 'csv'))}
+        )
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"сценарий":<26}{"запросов":>9}'
+            + ''.join(f'{f"p{percent}, мс":>11}' for percent in PERCENTILES)
+            + f'{"SQL ср.":>9}{"SQL макс.":>10}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<26}{result["requests"]:>9}'
+                + ''.join(
+                    f'{result[f"p{percent}"]:>11.2f}'
+                    for percent in PERCENTILES
+                )
+                + f'{result["queries_avg"]:>9.2f}'
+                f'{result["queries_max"]:>10}'
+            )
+
+    def compare(self, results, baseline_path, tolerance):
+        """Регрессия: рост p95 сверх допуска или рост числа запросов."""
+        with open(baseline_path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = []
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            previous = baseline[name]
+            if result['p95'] > previous['p95'] * (1 + tolerance / 100):
+                regressions.append(
+                    f'{name}: p95 {previous["p95"]} -> {result["p95"]} мс'
+                )
+            if result['queries_max'] > previous['queries_max']:
+                regressions.append(
+                    f'{name}: SQL {previous["queries_max"]} -> '
+                    f'{result["queries_max"]}'
+                )
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий не найдено.'))
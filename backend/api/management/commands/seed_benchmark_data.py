@@ -0,0 +1,323 @@
+import csv
+import io
+import random
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from PIL import Image
+
+from api import reference_cache, response_cache
+from api.pagination import bump_count_version
+from recipes import feed
+from recipes.images import build_image_variants
+from recipes.models import (
+    Cart, Favorite, Ingredient, Recipe, RecipeIngredient, Tag
+)
+from users.models import Follow, User
+
+USER_PREFIX = 'benchmark-user-'
+RECIPE_PREFIX = 'benchmark-recipe-'
+TAG_PREFIX = 'benchmark-tag-'
+BENCHMARK_PASSWORD = 'benchmark-password'
+BENCHMARK_IMAGE = 'recipes/images/benchmark.png'
+BENCHMARK_IMAGE_SIZE = (640, 480)
+
+
+class Command(BaseCommand):
+    help = ('Генерация синтетических данных для нагрузочного '
+            'тестирования. Повторный запуск досоздаёт недостающее.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--recipes', type=int, default=20_000)
+        parser.add_argument('--tags', type=int, default=6)
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=8
+        )
+        parser.add_argument(
+            '--favorites-per-user', type=int, default=30
+        )
+        parser.add_argument('--carts-per-user', type=int, default=5)
+        parser.add_argument('--follows-per-user', type=int, default=10)
+        parser.add_argument(
+            '--ingredients-file',
+            default=settings.BASE_DIR.parent / 'data' / 'ingredients.csv',
+            help='CSV: название, единица измерения.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора для воспроизводимых данных.'
+        )
+        parser.add_argument(
+            '--cleanup',
+            action='store_true',
+            help='Удалить данные набора вместо генерации.'
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        if options['cleanup']:
+            self.cleanup()
+            return
+        ingredient_ids = self.seed_ingredients(options['ingredients_file'])
+        tag_ids = self.seed_tags(options['tags'])
+        self.image, self.image_variants = self.seed_image()
+        user_ids, new_user_ids = self.seed_users(options['users'])
+        recipe_ids = self.seed_recipes(
+            options['recipes'], user_ids, tag_ids,
+            ingredient_ids, options['ingredients_per_recipe']
+        )
+        for model, per_user in (
+            (Favorite, options['favorites_per_user']),
+            (Cart, options['carts_per_user'])
+        ):
+            self.seed_user_recipes(
+                model, new_user_ids, recipe_ids, per_user
+            )
+        self.seed_follows(
+            new_user_ids, user_ids, options['follows_per_user']
+        )
+        self.stdout.write('Пересчёт счётчиков и поисковых векторов...')
+        benchmark_recipes = Recipe.objects.filter(
+            name__startswith=RECIPE_PREFIX
+        )
+        benchmark_recipes.recount_stats()
+        benchmark_recipes.update_search_vector()
+        self.invalidate_caches()
+        self.stdout.write(self.style.SUCCESS('Данные созданы.'))
+
+    def invalidate_caches(self):
+        bump_count_version('recipes')
+        reference_cache.tags.invalidate()
+        reference_cache.ingredients.invalidate()
+        response_cache.invalidate(
+            response_cache.RECIPE_LIST,
+            response_cache.RECIPE_POPULARITY
+        )
+
+    def cleanup(self):
+        """Удаление рецептов, пользователей и тегов набора.
+
+        Удаление идёт через ORM пачками, чтобы сработали сигналы:
+        счётчики рецептов, ленты и освобождение изображений.
+        Ингредиенты из CSV остаются.
+        """
+        recipe_ids = list(
+            Recipe.objects.filter(
+                name__startswith=RECIPE_PREFIX
+            ).values_list('id', flat=True)
+        )
+        for batch in self.batches(recipe_ids):
+            with transaction.atomic():
+                Recipe.objects.filter(pk__in=batch).delete()
+        self.stdout.write(f'Удалено рецептов: {len(recipe_ids)}')
+        user_ids = list(
+            User.objects.filter(
+                username__startswith=USER_PREFIX
+            ).values_list('id', flat=True)
+        )
+        for batch in self.batches(user_ids):
+            with transaction.atomic():
+                User.objects.filter(pk__in=batch).delete()
+        self.stdout.write(f'Удалено пользователей: {len(user_ids)}')
+        Tag.objects.filter(slug__startswith=TAG_PREFIX).delete()
+        self.invalidate_caches()
+        self.stdout.write(self.style.SUCCESS('Данные удалены.'))
+
+    def batches(self, items):
+        for start in range(0, len(items), self.batch_size):
+            yield items[start:start + self.batch_size]
+
+    def seed_ingredients(self, path):
+        """Ингредиенты из CSV, уже существующие пропускаются."""
+        existing = set(
+            Ingredient.objects.values_list('name', 'measurement_unit')
+        )
+        with open(path, encoding='utf-8') as file:
+            missing = {
+                (name, measurement_unit)
+                for name, measurement_unit in csv.reader(file)
+            } - existing
+        Ingredient.objects.bulk_create(
+            (
+                Ingredient(name=name, measurement_unit=measurement_unit)
+                for name, measurement_unit in sorted(missing)
+            ),
+            batch_size=self.batch_size
+        )
+        self.stdout.write(f'Создано ингредиентов: {len(missing)}')
+        return list(Ingredient.objects.values_list('id', flat=True))
+
+    def seed_image(self):
+        """Общее изображение рецептов набора.
+
+        Файл сохраняется через хранилище, копии строятся один раз
+        и сразу записываются в рецепты, чтобы process_recipe_images
+        не обрабатывал каждый рецепт.
+        """
+        buffer = io.BytesIO()
+        Image.new('RGB', BENCHMARK_IMAGE_SIZE, '#e0e0e0').save(buffer, 'png')
+        recipe = Recipe(
+            image=Recipe._meta.get_field('image').storage.save(
+                BENCHMARK_IMAGE, ContentFile(buffer.getvalue())
+            )
+        )
+        variants = build_image_variants(recipe)
+        Recipe.objects.filter(
+            name__startswith=RECIPE_PREFIX
+        ).exclude(image=recipe.image.name).update(
+            image=recipe.image.name, image_variants=variants
+        )
+        return recipe.image.name, variants
+
+    def seed_tags(self, count):
+        for number in range(count):
+            Tag.objects.get_or_create(
+                slug=f'{TAG_PREFIX}{number}',
+                defaults={
+                    'name': f'{TAG_PREFIX}{number}',
+                    'color': f'#{self.random.randrange(0x1000000):06x}'
+                }
+            )
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def seed_users(self, total):
+        """Пользователи с общим паролем BENCHMARK_PASSWORD.
+
+        Возвращает всех пользователей набора и только что созданных.
+        """
+        users = User.objects.filter(username__startswith=USER_PREFIX)
+        existing_ids = list(users.values_list('id', flat=True))
+        password = make_password(BENCHMARK_PASSWORD)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f'{USER_PREFIX}{number}',
+                    email=f'{USER_PREFIX}{number}@example.com',
+                    first_name='Benchmark',
+                    last_name=str(number),
+                    password=password
+                )
+                for number in range(len(existing_ids), total)
+            ),
+            batch_size=self.batch_size
+        )
+        user_ids = list(users.values_list('id', flat=True))
+        new_ids = sorted(set(user_ids) - set(existing_ids))
+        self.stdout.write(f'Создано пользователей: {len(new_ids)}')
+        return user_ids, new_ids
+
+    def seed_recipes(self, total, user_ids, tag_ids,
+                     ingredient_ids, ingredients_per_recipe):
+        """Рецепты с тегами и ингредиентами, пачками по batch_size."""
+        existing = Recipe.objects.filter(
+            name__startswith=RECIPE_PREFIX
+        ).count()
+        names = [
+            f'{RECIPE_PREFIX}{number}' for number in range(existing, total)
+        ]
+        through = Recipe.tags.through
+        ingredients_per_recipe = min(
+            ingredients_per_recipe, len(ingredient_ids)
+        )
+        created = existing
+        for batch in self.batches(names):
+            with transaction.atomic():
+                Recipe.objects.bulk_create(
+                    Recipe(
+                        name=name,
+                        text=f'{name}: синтетический рецепт',
+                        cooking_time=self.random.randint(1, 180),
+                        author_id=self.random.choice(user_ids),
+                        image=self.image,
+                        image_variants=self.image_variants
+                    )
+                    for name in batch
+                )
+                batch_ids = list(
+                    Recipe.objects.filter(
+                        name__in=batch
+                    ).values_list('id', flat=True)
+                )
+                through.objects.bulk_create(
+                    through(recipe_id=recipe_id, tag_id=tag_id)
+                    for recipe_id in batch_ids
+                    for tag_id in self.random.sample(
+                        tag_ids, self.random.randint(1, min(3, len(tag_ids)))
+                    )
+                )
+                RecipeIngredient.objects.bulk_create(
+                    (
+                        RecipeIngredient(
+                            recipe_id=recipe_id,
+                            ingredient_id=ingredient_id,
+                            amount=self.random.randint(1, 500)
+                        )
+                        for recipe_id in batch_ids
+                        for ingredient_id in self.random.sample(
+                            ingredient_ids, ingredients_per_recipe
+                        )
+                    ),
+                    batch_size=self.batch_size
+                )
+            created += len(batch)
+            self.stdout.write(f'Создано рецептов: {created}')
+        return list(
+            Recipe.objects.filter(
+                name__startswith=RECIPE_PREFIX
+            ).values_list('id', flat=True)
+        )
+
+    def seed_user_recipes(self, model, user_ids, recipe_ids, per_user):
+        """Избранное/корзины, повторы отбрасываются ограничением."""
+        per_user = min(per_user, len(recipe_ids))
+        for batch in self.batches(user_ids):
+            model.objects.bulk_create(
+                (
+                    model(user_id=user_id, recipe_id=recipe_id)
+                    for user_id in batch
+                    for recipe_id in self.random.sample(recipe_ids, per_user)
+                ),
+                batch_size=self.batch_size,
+                ignore_conflicts=True
+            )
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: '
+            f'{model.objects.filter(recipe_id__in=recipe_ids).count()}'
+        )
+
+    def seed_follows(self, follower_ids, user_ids, per_user):
+        """Подписки новых пользователей и их ленты."""
+        per_user = min(per_user, len(user_ids) - 1)
+        for batch in self.batches(follower_ids):
+            followings = {
+                user_id: [
+                    author_id
+                    for author_id in self.random.sample(user_ids, per_user + 1)
+                    if author_id != user_id
+                ][:per_user]
+                for user_id in batch
+            }
+            with transaction.atomic():
+                Follow.objects.bulk_create(
+                    (
+                        Follow(user_id=user_id, following_id=author_id)
+                        for user_id, author_ids in followings.items()
+                        for author_id in author_ids
+                    ),
+                    batch_size=self.batch_size,
+                    ignore_conflicts=True
+                )
+                for user_id, author_ids in followings.items():
+                    feed.backfill(user_id, author_ids)
+        self.stdout.write(
+            f'Подписок: '
+            f'{Follow.objects.filter(user_id__in=follower_ids).count()}'
+        )
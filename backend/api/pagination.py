@@ -1,7 +1,147 @@
-from rest_framework.pagination import PageNumberPagination
+from functools import partial
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+COUNT_CACHE_TIMEOUT = 30
+ESTIMATE_THRESHOLD = 100_000
+COUNT_IGNORED_PARAMS = ('page', 'limit', 'cursor', 'ordering', 'format')
+
+
+def get_count_version(prefix, user_id=None):
+    """Текущая версия закешированных счётчиков."""
+    return cache.get_or_set(f'count_version:{prefix}:{user_id}', 1, None)
+
+
+def bump_count_version(prefix, user_id=None):
+    """Сброс закешированных счётчиков сменой версии."""
+    key = f'count_version:{prefix}:{user_id}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def estimate_count(model):
+    """Оценка числа строк таблицы по статистике PostgreSQL."""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class '
+            'WHERE oid = %s::regclass',
+            [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class CountingPaginator(Paginator):
+    """Paginator с кешированием и оценкой количества объектов."""
+    def __init__(self, object_list, per_page, cache_key=None,
+                 estimate=False, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.estimate = estimate
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            return self.get_count()
+        count = cache.get(self.cache_key)
+        if count is None:
+            count = self.get_count()
+            cache.set(self.cache_key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    def get_count(self):
+        """Подсчёт без сортировки, аннотаций и DISTINCT.
+
+        Отфильтрованные id проверяются полусоединением,
+        поэтому дубли строк от join не влияют на результат.
+        """
+        model = self.object_list.model
+        if self.estimate:
+            estimate = estimate_count(model)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        if not self.object_list.query.has_filters():
+            return model._default_manager.count()
+        ids = self.object_list.order_by().values('pk')
+        ids.query.distinct = False
+        return model._default_manager.filter(pk__in=ids).count()
+
+
+class KeysetPagination(CursorPagination):
+    """Курсорная пагинация по стабильному порядку модели.
+    Не выполняет COUNT(*) и не использует OFFSET для глубоких страниц."""
+    page_size = 10
+    page_size_query_param = 'limit'
+
+    def get_ordering(self, request, queryset, view):
+        return queryset.model._meta.ordering or ('id',)
 
 
 class CustomPagination(PageNumberPagination):
-    """Пагинация для рецептов с параметром 'limit'."""
+    """Пагинация для рецептов с параметром 'limit'.
+    При наличии параметра 'cursor' переключается на курсорную.
+    Вьюсеты с атрибутом count_cache_prefix кешируют количество объектов."""
     page_size = 10
     page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    keyset_pagination = None
+
+    def get_count_params(self, request):
+        """Нормализованные параметры фильтрации."""
+        return sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in COUNT_IGNORED_PARAMS
+            for value in values
+        )
+
+    def get_count_cache_key(self, request, view, params):
+        prefix = getattr(view, 'count_cache_prefix', None)
+        if prefix is None:
+            return None
+        user_params = getattr(view, 'count_cache_user_params', ())
+        user_id = None
+        if any(key in user_params for key, _ in params):
+            user_id = request.user.pk
+        version = (f'{get_count_version(prefix)}.'
+                   f'{get_count_version(prefix, user_id)}')
+        digest = md5(urlencode(params).encode()).hexdigest()
+        return f'count:{prefix}:{user_id}:{version}:{digest}'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.keyset_pagination = KeysetPagination()
+            return self.keyset_pagination.paginate_queryset(
+                queryset, request, view
+            )
+        params = self.get_count_params(request)
+        cache_key = self.get_count_cache_key(request, view, params)
+        self.django_paginator_class = partial(
+            CountingPaginator,
+            cache_key=cache_key,
+            estimate=cache_key is not None and not params
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset_pagination is not None:
+            return self.keyset_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class CursorOnlyPagination(CustomPagination):
+    """Список без пагинации, курсорная пагинация по запросу."""
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,185 @@
+import cProfile
+import contextvars
+import json
+import logging
+import os
+import random
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from rest_framework import serializers
+
+logger = logging.getLogger('api.profiling')
+
+current_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос выполнил больше SQL-запросов, чем разрешено эндпоинту."""
+
+
+class RequestMetrics:
+    """Метрики одного запроса: SQL, сериализация и общее время."""
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.started = time.perf_counter()
+        self.total_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка выполнения SQL для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    @contextmanager
+    def serializer_timer(self):
+        """Время сериализации, вложенные сериализаторы не учитываются."""
+        self.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.serializer_depth -= 1
+            if not self.serializer_depth:
+                self.serializer_time += time.perf_counter() - started
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing (длительности в мс)."""
+        return (
+            f'db;dur={self.db_time * 1000:.1f};'
+            f'desc="{self.queries} queries", '
+            f'serializer;dur={self.serializer_time * 1000:.1f}, '
+            f'total;dur={self.total_time * 1000:.1f}'
+        )
+
+
+def instrument_serializers():
+    """Учёт времени сериализации через свойство BaseSerializer.data.
+
+    Вызывается один раз при старте приложения. Вне запроса
+    с метриками обёртка ничего не делает.
+    """
+    data = serializers.BaseSerializer.data.fget
+    if getattr(data, 'instrumented', False):
+        return
+
+    def timed_data(self):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return data(self)
+        with metrics.serializer_timer():
+            return data(self)
+
+    timed_data.instrumented = True
+    serializers.BaseSerializer.data = property(timed_data)
+
+
+def get_query_budget(view_func, method):
+    """Бюджет запросов из атрибута query_budgets вьюсета.
+
+    Ключи - имена действий (list, retrieve, feed, ...).
+    """
+    budgets = getattr(getattr(view_func, 'cls', None), 'query_budgets', None)
+    if not budgets:
+        return None
+    actions = getattr(view_func, 'actions', None) or {}
+    return budgets.get(actions.get(method.lower(), method.lower()))
+
+
+def should_profile(request):
+    """Профилирование по ?profile=1 или случайная выборка запросов."""
+    if 'profile' in request.GET and (
+        settings.DEBUG
+        or settings.PROFILE_TOKEN
+        and request.headers.get('X-Profile-Token') == settings.PROFILE_TOKEN
+    ):
+        return True
+    return random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+def dump_profile(profiler, request):
+    """Сохранение профиля cProfile для анализа через pstats/snakeviz."""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    name = '{}-{}-{}.prof'.format(
+        time.strftime('%Y%m%d%H%M%S'),
+        request.method,
+        request.path.strip('/').replace('/', '_') or 'root'
+    )
+    path = os.path.join(settings.PROFILE_DIR, name)
+    profiler.dump_stats(path)
+    return path
+
+
+class ProfilingMiddleware:
+    """Метрики запроса, бюджеты запросов и выборочное профилирование.
+
+    Считает SQL-запросы и их время на всех соединениях, время
+    сериализации и общее время ответа, отдаёт их в заголовке
+    Server-Timing и пишет в лог api.profiling одной JSON-строкой.
+    Время формирования тела потоковых ответов не учитывается.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        profiler = cProfile.Profile() if should_profile(request) else None
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                if profiler:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler:
+                        profiler.disable()
+        finally:
+            current_metrics.reset(token)
+        metrics.finish()
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_time * 1000, 1),
+            'serializer_ms': round(metrics.serializer_time * 1000, 1),
+            'total_ms': round(metrics.total_time * 1000, 1),
+        }
+        if profiler:
+            record['profile'] = dump_profile(profiler, request)
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None:
+            record['query_budget'] = budget
+        slow = record['total_ms'] >= settings.SLOW_REQUEST_MS
+        logger.log(
+            logging.WARNING if slow else logging.INFO,
+            json.dumps(record, ensure_ascii=False)
+        )
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing()
+        if budget is not None and metrics.queries > budget:
+            message = (
+                f'{request.method} {request.path}: '
+                f'{metrics.queries} запросов при бюджете {budget}.'
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func, request.method)
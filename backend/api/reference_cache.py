@@ -0,0 +1,83 @@
+import time
+
+from django.core.cache import cache
+
+from recipes.models import Ingredient, Tag
+
+
+class ReferenceCache:
+    """Версионированный кеш справочника.
+
+    Данные хранятся в памяти процесса и в общем кеше Django.
+    Версия лежит в общем кеше, её смена сигналом заставляет
+    все процессы перечитать справочник.
+    """
+    def __init__(self, name, model, fields):
+        self.name = name
+        self.model = model
+        self.fields = fields
+        self.snapshot = (None, (), {}, {})
+
+    @property
+    def version_key(self):
+        return f'reference:{self.name}:version'
+
+    def get_version(self):
+        return cache.get_or_set(self.version_key, time.time_ns, None)
+
+    def invalidate(self):
+        """Смена версии справочника."""
+        cache.set(self.version_key, time.time_ns(), None)
+
+    def load(self):
+        version = self.get_version()
+        if self.snapshot[0] == version:
+            return self.snapshot
+        data_key = f'reference:{self.name}:{version}'
+        items = cache.get(data_key)
+        if items is None:
+            items = list(
+                self.model.objects.order_by('id').values(*self.fields)
+            )
+            cache.set(data_key, items, None)
+        self.snapshot = (
+            version, items, {item['id']: item for item in items}, {}
+        )
+        return self.snapshot
+
+    def all(self):
+        """Все записи справочника."""
+        return self.load()[1]
+
+    def get(self, pk):
+        """Запись по id или None."""
+        return self.load()[2].get(pk)
+
+    def missing(self, pks):
+        """Id, которых нет в справочнике."""
+        items = self.load()[2]
+        return [pk for pk in pks if pk not in items]
+
+    def get_by(self, field):
+        """Индекс записей по значению поля."""
+        _, items, _, indexes = self.load()
+        if field not in indexes:
+            indexes[field] = {item[field]: item for item in items}
+        return indexes[field]
+
+
+tags = ReferenceCache('tags', Tag, ('id', 'name', 'color', 'slug'))
+ingredients = ReferenceCache(
+    'ingredients', Ingredient, ('id', 'name', 'measurement_unit')
+)
+
+
+def get_tag_ids(slugs):
+    """Id тегов по списку слагов без обращения к БД."""
+    tag_by_slug = tags.get_by('slug')
+    return [tag_by_slug[slug]['id'] for slug in slugs if slug in tag_by_slug]
+
+
+def get_tag_choices():
+    """Варианты слагов для фильтра по тегам."""
+    return [(tag['slug'], tag['slug']) for tag in tags.all()]
@@ -0,0 +1,57 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Даты и время отдаются в default, то есть в кодировщик DRF, чтобы
+# формат совпадал с JSONRenderer. Подклассы str, int, dict и list
+# (ReturnDict, SafeString) orjson кодирует сам, как и json, результат
+# тот же. Отличие одно: NaN и бесконечности orjson пишет как null,
+# а JSONRenderer при STRICT_JSON выбрасывает ValueError. Поиск таких
+# значений обошёлся бы дороже самого orjson, а в ответах API чисел
+# с плавающей точкой нет (Decimal кодируется строкой).
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_NON_STR_KEYS
+    if orjson else 0
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson.
+
+    Без orjson, при отступах (indent), нестандартных настройках
+    UNICODE_JSON/COMPACT_JSON/STRICT_JSON и для значений, которые
+    orjson не кодирует (например, целые больше 64 бит), работает
+    стандартный JSONRenderer. Типы, которых нет в JSON (Decimal,
+    datetime, ленивые строки перевода), кодируются тем же
+    JSONEncoder из DRF.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и JSONRenderer, экранирует U+2028 и U+2029 для JavaScript.
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace(
+            '\u2029'.encode(), b'\\u2029'
+        )
@@ -0,0 +1,176 @@
+import time
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Теги зависимостей. Списки зависят от состава и порядка рецептов,
+# каждый ответ - от вошедших в него рецептов, авторов, тегов
+# и ингредиентов.
+RECIPE_LIST = 'recipe-list'
+RECIPE_SEARCH = 'recipe-search'
+RECIPE_POPULARITY = 'recipe-popularity'
+HIT = 'HIT'
+MISS = 'MISS'
+
+
+def recipe_tag(pk):
+    return f'recipe:{pk}'
+
+
+def user_tag(pk):
+    return f'user:{pk}'
+
+
+def tag_tag(pk):
+    return f'tag:{pk}'
+
+
+def ingredient_tag(pk):
+    return f'ingredient:{pk}'
+
+
+def tag_version_key(tag):
+    return f'response-tag:{tag}'
+
+
+def get_tag_versions(tags):
+    """Текущие версии тегов одним обращением к кешу."""
+    keys = [tag_version_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    return [versions.get(key) for key in keys]
+
+
+def get_versions(tags):
+    """Текущие версии тегов, отсутствующие в кеше создаются."""
+    versions = get_tag_versions(tags)
+    if None in versions:
+        version = time.time_ns()
+        cache.set_many(
+            {
+                tag_version_key(tag): version
+                for tag, current in zip(tags, versions) if current is None
+            },
+            None
+        )
+        versions = [current or version for current in versions]
+    return versions
+
+
+def invalidate(*tags):
+    """Смена версий тегов делает зависящие от них ответы устаревшими.
+
+    Ключи ответов не перебираются, поэтому подходит любой бэкенд
+    кеша Django. Пропавшая из кеша версия тоже считается сменой.
+    """
+    version = time.time_ns()
+    cache.set_many({tag_version_key(tag): version for tag in tags}, None)
+
+
+def get_key(request):
+    """Ключ ответа по хосту, пути и нормализованным параметрам."""
+    params = urlencode(
+        sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values if value != ''
+        )
+    )
+    digest = md5(
+        f'{request.get_host()}{request.path}?{params}'.encode()
+    ).hexdigest()
+    return f'response:{digest}'
+
+
+def get_list_tags(request):
+    """Теги списка, зависящие от параметров запроса."""
+    tags = [RECIPE_LIST]
+    if request.query_params.get('search'):
+        tags.append(RECIPE_SEARCH)
+    if 'popularity' in request.query_params.get('ordering', ''):
+        tags.append(RECIPE_POPULARITY)
+    return tags
+
+
+def get_recipe_tags(recipe):
+    """Теги сериализованного рецепта."""
+    return [
+        recipe_tag(recipe['id']),
+        user_tag(recipe['author']['id']),
+        *(tag_tag(tag['id']) for tag in recipe['tags']),
+        *(
+            ingredient_tag(ingredient['id'])
+            for ingredient in recipe['ingredients']
+        ),
+    ]
+
+
+def get_page_tags(request, data):
+    """Теги страницы списка рецептов."""
+    return get_list_tags(request) + [
+        tag for recipe in data['results'] for tag in get_recipe_tags(recipe)
+    ]
+
+
+def get_subscriptions_tags(data):
+    """Теги страницы подписок: авторы, их рецепты и их количество."""
+    return [RECIPE_LIST] + [
+        tag
+        for author in data['results']
+        for tag in (
+            user_tag(author['id']),
+            *(recipe_tag(recipe['id']) for recipe in author['recipes'])
+        )
+    ]
+
+
+def count(event):
+    """Счётчик попаданий/промахов в общем кеше."""
+    key = f'response-metrics:{event}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def get_metrics():
+    metrics = cache.get_many(
+        [f'response-metrics:{event}' for event in (HIT, MISS)]
+    )
+    return {
+        event: metrics.get(f'response-metrics:{event}', 0)
+        for event in (HIT, MISS)
+    }
+
+
+def reset_metrics():
+    cache.delete_many(
+        [f'response-metrics:{event}' for event in (HIT, MISS)]
+    )
+
+
+def load(key):
+    """Данные ответа и версии его тегов, если ни один
+    из тегов не сменил версию."""
+    entry = cache.get(key)
+    if entry is not None:
+        data, tags, versions = entry
+        if get_tag_versions(tags) == versions:
+            count(HIT)
+            return data, versions
+    count(MISS)
+    return None
+
+
+def store(key, data, tags):
+    """Сохранение данных ответа с текущими версиями тегов.
+
+    Изменение, попавшее между чтением из БД и сохранением,
+    живёт не дольше RESPONSE_CACHE_TIMEOUT.
+    """
+    tags = sorted(frozenset(tags))
+    versions = get_versions(tags)
+    cache.set(key, (data, tags, versions), settings.RESPONSE_CACHE_TIMEOUT)
+    return versions
@@ -1,29 +1,99 @@
-import base64
+import binascii
+from tempfile import SpooledTemporaryFile
 
 from djoser.serializers import UserSerializer
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
 from rest_framework import serializers
 
 from users.models import User
 from recipes.models import (
-    Tag, Ingredient, Recipe, RecipeIngredient
+    Tag, Ingredient, Recipe, RecipeIngredient, ShoppingListExport
 )
+from . import reference_cache
+from .shopping_list import RENDERERS
 
 MIN_INGREDIENT_AMOUNT = 1
+BULK_MAX_SIZE = 500
+BASE64_CHUNK_SIZE = 64 * 1024
 
 
 class Base64ImageField(serializers.ImageField):
-    """Кастомный тип поля изображений."""
+    """Кастомный тип поля изображений.
+
+    Base64 декодируется частями во временный файл,
+    размер проверяется до и во время декодирования.
+    """
+    default_error_messages = {
+        'too_large': 'Размер изображения превышает {max_size} байт.',
+    }
+
+    def decode(self, img_str):
+        max_size = settings.RECIPE_IMAGE_MAX_SIZE
+        if len(img_str) * 3 // 4 > max_size + 2:
+            self.fail('too_large', max_size=max_size)
+        decoded = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        for start in range(0, len(img_str), BASE64_CHUNK_SIZE):
+            try:
+                decoded.write(binascii.a2b_base64(
+                    img_str[start:start + BASE64_CHUNK_SIZE]
+                ))
+            except binascii.Error:
+                self.fail('invalid_image')
+            if decoded.tell() > max_size:
+                self.fail('too_large', max_size=max_size)
+        decoded.seek(0)
+        return decoded
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
             _format, img_str = data.split(';base64,')
             ext = _format.split('/')[-1]
-            data = ContentFile(
-                base64.b64decode(img_str), name='temp.' + ext
-            )
+            data = File(self.decode(img_str), name='temp.' + ext)
         return super().to_internal_value(data)
 
 
+def get_srcset(variants, request):
+    """Ссылки на копии изображения по форматам в виде srcset."""
+    srcset = {}
+    for image_format, widths in (variants or {}).items():
+        urls = []
+        for width, name in widths.items():
+            url = default_storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls.append(f'{url} {width}w')
+        srcset[image_format] = ', '.join(urls)
+    return srcset
+
+
+class ImageSrcsetField(serializers.Field):
+    """Ссылки на уменьшенные копии изображения в формате srcset."""
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        kwargs.setdefault('source', 'image_variants')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return get_srcset(value, self.context.get('request'))
+
+
+class CachedTagField(serializers.PrimaryKeyRelatedField):
+    """Id тега с проверкой существования по кешу справочника."""
+    def to_internal_value(self, data):
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if reference_cache.tags.get(pk) is None:
+            self.fail('does_not_exist', pk_value=data)
+        return pk
+
+
 class CustomUserSerializer(UserSerializer):
     """Селиализатор модели User"""
     is_subscribed = serializers.SerializerMethodField()
@@ -41,10 +111,28 @@ class CustomUserSerializer(UserSerializer):
 
     def get_is_subscribed(self, obj):
         """Проверка подписки."""
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context.get("request").user
-        if user.is_anonymous or user == obj:
+        if (user.is_anonymous or user == obj
+                or self.context.get('user_state') is False):
             return False
-        return user.follower.filter(following_id=obj.id).exists()
+        return obj.id in self.get_following_ids()
+
+    def get_following_ids(self):
+        """Id авторов, на которых подписан пользователь.
+
+        Загружаются одним запросом и кешируются на объекте запроса,
+        чтобы вложенные сериализаторы авторов не ходили в БД.
+        """
+        request = self.context.get("request")
+        if not hasattr(request, 'following_ids'):
+            request.following_ids = set(
+                request.user.follower.values_list(
+                    'following_id', flat=True
+                )
+            )
+        return request.following_ids
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -106,11 +194,14 @@ class RecipeGetSerializer(serializers.ModelSerializer):
     )
     is_favorited = serializers.BooleanField(
         read_only=True,
+        default=False
     )
     is_in_shopping_cart = serializers.BooleanField(
         read_only=True,
+        default=False
     )
     image = Base64ImageField()
+    image_srcset = ImageSrcsetField()
 
     class Meta:
         model = Recipe
@@ -123,6 +214,7 @@ class RecipeGetSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_srcset',
             'text',
             'cooking_time'
         )
@@ -130,7 +222,7 @@ class RecipeGetSerializer(serializers.ModelSerializer):
 
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для модели Recip (основной)."""
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = CachedTagField(
         queryset=Tag.objects.all(),
         many=True
     )
@@ -165,14 +257,11 @@ class RecipeSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(
                     'Количество ингредиента должно быть больше 0.'
                 )
-            if not Ingredient.objects.filter(
-                    pk=ingredient.get('id')
-            ).exists():
-                raise serializers.ValidationError(
-                    (f'Ингредиента с id - '
-                     f'{ingredient.get("id")}, не существует.')
-                )
         id_list = [ingredient.get('id') for ingredient in value]
+        if missing := reference_cache.ingredients.missing(id_list):
+            raise serializers.ValidationError(
+                f'Ингредиента с id - {missing[0]}, не существует.'
+            )
         if len(id_list) != len(set(id_list)):
             raise serializers.ValidationError(
                 'Дублирование ингредиента.'
@@ -197,19 +286,54 @@ class RecipeSerializer(serializers.ModelSerializer):
             instance, context=self.context
         ).data
 
-    def create_and_update_objects(self, recipe, ingredients, tags):
-        recipe.tags.set(tags)
-        ingredients_list = []
-        for ingredient in ingredients:
-            new_ingredient = RecipeIngredient(
+    def save_ingredients(self, recipe, ingredients):
+        """Сохранение ингредиентов рецепта.
+
+        Существующие строки сравниваются с новыми: удаляются,
+        обновляются и добавляются только изменившиеся.
+        """
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        existing = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in RecipeIngredient.objects.filter(
+                recipe=recipe
+            )
+        }
+        removed = [
+            recipe_ingredient.pk
+            for ingredient_id, recipe_ingredient in existing.items()
+            if ingredient_id not in amounts
+        ]
+        changed = []
+        for ingredient_id, amount in amounts.items():
+            recipe_ingredient = existing.get(ingredient_id)
+            if recipe_ingredient and recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        if removed:
+            RecipeIngredient.objects.filter(pk__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['amount'])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
                 recipe=recipe,
-                ingredient_id=ingredient['id'],
-                amount=ingredient['amount'],
+                ingredient_id=ingredient_id,
+                amount=amount
             )
-            ingredients_list.append(new_ingredient)
-        RecipeIngredient.objects.bulk_create(ingredients_list)
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in existing
+        )
+
+    def create_and_update_objects(self, recipe, ingredients, tags):
+        recipe.tags.set(tags)
+        self.save_ingredients(recipe, ingredients)
+        Recipe.objects.filter(pk=recipe.pk).update_search_vector()
         return recipe
 
+    @transaction.atomic
     def create(self, validated_data):
         """Создание рецепта."""
         ingredients = validated_data.pop('ingredients')
@@ -221,6 +345,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             tags=tags
         )
 
+    @transaction.atomic
     def update(self, recipe, validated_data):
         """Обновление рецепта"""
         if (not validated_data.get('ingredients')
@@ -228,9 +353,10 @@ class RecipeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Не все обязательные поля заполнены.'
             )
-        recipe.ingredients.clear()
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
+        if 'image' in validated_data:
+            validated_data['image_variants'] = None
         recipe = super().update(recipe, validated_data)
         return self.create_and_update_objects(
             recipe=recipe,
@@ -241,12 +367,15 @@ class RecipeSerializer(serializers.ModelSerializer):
 
 class RecipesShortSerializer(serializers.ModelSerializer):
     """Сериализатор для модели Recipe в подписках/корзине."""
+    image_srcset = ImageSrcsetField()
+
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'image',
+            'image_srcset',
             'cooking_time'
         )
 
@@ -270,17 +399,52 @@ class SubscriptionsSerializer(CustomUserSerializer):
         )
 
     def get_recipes_count(self, obj):
-        """Подсчет количества рецептов у пользователя."""
-        return obj.recipes.count()
+        """Количество рецептов у пользователя (аннотация)."""
+        return obj.recipes_count
 
     def get_recipes(self, obj):
-        """Ограничение количества выводимых рецептов, в подписках."""
-        queryset = Recipe.objects.filter(author=obj)
-        if recipes_limit := self.context['request'].GET.get(
-                'recipes_limit'
-        ):
-            queryset = queryset[:int(recipes_limit)]
+        """Рецепты автора, ограниченные параметром recipes_limit."""
         return RecipesShortSerializer(
-            queryset,
+            obj.limited_recipes,
             many=True
         ).data
+
+
+class ShoppingListExportSerializer(serializers.ModelSerializer):
+    """Сериализатор задачи на выгрузку списка покупок."""
+    format = serializers.ChoiceField(
+        choices=tuple(RENDERERS),
+        default='pdf'
+    )
+
+    class Meta:
+        model = ShoppingListExport
+        fields = ('id', 'format', 'status', 'error')
+        read_only_fields = ('status', 'error')
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    """Список идентификаторов для массовых операций.
+
+    Существование объектов проверяется одним запросом
+    к queryset, переданному в контексте.
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_MAX_SIZE
+    )
+
+    def validate_ids(self, value):
+        ids = set(value)
+        missing = ids - set(
+            self.context['queryset'].filter(
+                id__in=ids
+            ).values_list('id', flat=True)
+        )
+        if missing:
+            raise serializers.ValidationError(
+                f'Не существуют объекты с id: '
+                f'{", ".join(map(str, sorted(missing)))}.'
+            )
+        return sorted(ids)
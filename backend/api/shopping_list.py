@@ -0,0 +1,195 @@
+import csv
+from abc import ABC, abstractmethod
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Sum
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework import renderers
+
+from recipes.models import Ingredient, ShoppingListExport
+from .renderers import FastJSONRenderer
+
+FONT_NAME = 'FreeSans'
+FONT_PATH = os.path.join(
+    settings.BASE_DIR, 'static', 'fonts', 'FreeSans.ttf'
+)
+FONT_SIZE = 12
+PAGE_LEFT = 100
+PAGE_TOP = 730
+PAGE_BOTTOM = 60
+TITLE = 'Список покупок:'
+CHUNK_SIZE = 64 * 1024
+EXPORT_DIR = 'shopping_lists'
+
+
+def register_fonts():
+    """Регистрация шрифта для PDF, выполняется один раз при старте."""
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+def get_shopping_list(user):
+    """Суммарное количество ингредиентов из корзины пользователя.
+
+    Агрегация выполняется одним сгруппированным запросом,
+    поэтому размер результата зависит только от числа
+    различных ингредиентов, а не от количества рецептов.
+    """
+    return Ingredient.objects.filter(
+        recipe_ingredient__recipe__cart_recipes__user=user
+    ).values(
+        'name', 'measurement_unit'
+    ).annotate(
+        amount=Sum('recipe_ingredient__amount')
+    ).order_by('name', 'measurement_unit')
+
+
+def format_line(row):
+    """Строка списка покупок."""
+    return (f'{row["name"]} '
+            f'({row["measurement_unit"]}) — '
+            f'{row["amount"]}')
+
+
+class Echo:
+    """Псевдо-буфер для построчной записи csv."""
+    def write(self, value):
+        return value
+
+
+class ShoppingListRenderer(ABC, renderers.BaseRenderer):
+    """Базовый рендерер списка покупок.
+
+    Используется для выбора формата через ?format=,
+    сам список отдаётся потоком из метода stream.
+    Через render проходят только ошибки (401, 404 и т.п.),
+    они отдаются в JSON, как на остальных эндпоинтах.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer = FastJSONRenderer()
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = renderer.media_type
+        return renderer.render(data, renderer.media_type, renderer_context)
+
+    @property
+    def content_type(self):
+        """Content-Type потокового ответа."""
+        if self.charset:
+            return f'{self.media_type}; charset={self.charset}'
+        return self.media_type
+
+    @abstractmethod
+    def stream(self, rows):
+        """Части файла: строки или байты."""
+
+
+class PDFRenderer(ShoppingListRenderer):
+    """Список покупок в PDF с переносом на новые страницы."""
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    render_style = 'binary'
+
+    def new_text_object(self, pdf_canvas):
+        text_object = pdf_canvas.beginText(PAGE_LEFT, PAGE_TOP)
+        text_object.setFont(FONT_NAME, FONT_SIZE)
+        return text_object
+
+    def stream(self, rows):
+        buffer = io.BytesIO()
+        pdf_canvas = canvas.Canvas(buffer)
+        pdf_canvas.setTitle('Ваш список покупок')
+        text_object = self.new_text_object(pdf_canvas)
+        text_object.textLine(TITLE)
+        for row in rows:
+            if text_object.getY() < PAGE_BOTTOM:
+                pdf_canvas.drawText(text_object)
+                pdf_canvas.showPage()
+                text_object = self.new_text_object(pdf_canvas)
+            text_object.textLine(format_line(row))
+        pdf_canvas.drawText(text_object)
+        pdf_canvas.save()
+        buffer.seek(0)
+        yield from iter(lambda: buffer.read(CHUNK_SIZE), b'')
+
+
+class TXTRenderer(ShoppingListRenderer):
+    """Список покупок в виде текста."""
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, rows):
+        yield f'{TITLE}\n'
+        for row in rows:
+            yield f'{format_line(row)}\n'
+
+
+class CSVRenderer(ShoppingListRenderer):
+    """Список покупок в CSV."""
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for row in rows:
+            yield writer.writerow(
+                (row['name'], row['measurement_unit'], row['amount'])
+            )
+
+
+RENDERERS = {
+    renderer.format: renderer
+    for renderer in (PDFRenderer, TXTRenderer, CSVRenderer)
+}
+
+
+def get_digest(rows, file_format):
+    """Хеш агрегированного списка (ингредиент, единица, количество)."""
+    hasher = hashlib.sha256(file_format.encode())
+    for row in rows:
+        hasher.update(
+            f'{row["name"]}\t{row["measurement_unit"]}\t'
+            f'{row["amount"]}\n'.encode()
+        )
+    return hasher.hexdigest()
+
+
+def get_export_name(digest, file_format):
+    """Имя файла выгрузки, адресуемого по содержимому."""
+    return f'{EXPORT_DIR}/{digest}.{file_format}'
+
+
+def render_export(rows, file_format):
+    """Формирование файла выгрузки или переиспользование готового.
+
+    Одинаковые корзины дают одинаковый хеш, поэтому файл
+    для них рендерится только один раз.
+    """
+    digest = get_digest(rows, file_format)
+    name = get_export_name(digest, file_format)
+    if not default_storage.exists(name):
+        renderer = RENDERERS[file_format]()
+        content = b''.join(
+            chunk if isinstance(chunk, bytes)
+            else chunk.encode(renderer.charset)
+            for chunk in renderer.stream(rows)
+        )
+        name = default_storage.save(name, ContentFile(content))
+    return digest, name
+
+
+def process_export(export):
+    """Выполнение задачи на формирование списка покупок."""
+    rows = list(get_shopping_list(export.user))
+    export.digest, export.file.name = render_export(rows, export.format)
+    export.status = ShoppingListExport.DONE
+    export.save(update_fields=['digest', 'file', 'status'])
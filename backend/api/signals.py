@@ -0,0 +1,135 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import (
+    Cart, Favorite, Ingredient, Recipe, RecipeIngredient, Tag
+)
+from users.models import Follow, User
+from . import conditional, reference_cache, response_cache
+from .pagination import bump_count_version
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_counts(sender, **kwargs):
+    """Сброс кеша количества рецептов."""
+    bump_count_version('recipes')
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Cart)
+def invalidate_user_recipe_counts(sender, instance, **kwargs):
+    """Сброс кеша количества избранных рецептов и рецептов в корзине."""
+    bump_count_version('recipes', instance.user_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_cache(sender, **kwargs):
+    """Сброс кеша тегов после фиксации транзакции: иначе параллельный
+    запрос закешировал бы под новой версией прежние данные."""
+    transaction.on_commit(reference_cache.tags.invalidate)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_cache(sender, **kwargs):
+    """Сброс кеша ингредиентов после фиксации транзакции."""
+    transaction.on_commit(reference_cache.ingredients.invalidate)
+
+
+def invalidate_responses(*tags):
+    """Сброс закешированных ответов после фиксации транзакции."""
+    transaction.on_commit(lambda: response_cache.invalidate(*tags))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_responses(sender, instance, **kwargs):
+    """Рецепт и списки, где меняется состав или порядок."""
+    invalidate_responses(
+        response_cache.recipe_tag(instance.pk),
+        response_cache.RECIPE_LIST
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags_responses(sender, instance, action, reverse,
+                                     pk_set, **kwargs):
+    """Смена тегов рецепта меняет и фильтрацию списков."""
+    if not action.startswith('post_'):
+        return
+    recipe_ids = (pk_set or ()) if reverse else (instance.pk,)
+    invalidate_responses(
+        response_cache.RECIPE_LIST,
+        *map(response_cache.recipe_tag, recipe_ids)
+    )
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_ingredient_responses(sender, instance, **kwargs):
+    """Состав рецепта, а с ним и результаты поиска."""
+    invalidate_responses(
+        response_cache.recipe_tag(instance.recipe_id),
+        response_cache.RECIPE_SEARCH
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_responses(sender, instance, update_fields, **kwargs):
+    """Данные автора в рецептах, кроме обновления last_login."""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_responses(
+        response_cache.user_tag(instance.pk),
+        conditional.USERS
+    )
+
+
+@receiver(post_delete, sender=User)
+def invalidate_users_responses(sender, **kwargs):
+    """Списки пользователей для условных запросов."""
+    invalidate_responses(conditional.USERS)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_responses(sender, instance, **kwargs):
+    """Тег в рецептах и фильтрация списков по слагу."""
+    invalidate_responses(
+        response_cache.tag_tag(instance.pk),
+        response_cache.RECIPE_LIST
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_responses(sender, instance, **kwargs):
+    """Ингредиент в рецептах и поиск по его названию."""
+    invalidate_responses(
+        response_cache.ingredient_tag(instance.pk),
+        response_cache.RECIPE_SEARCH
+    )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def invalidate_popularity_responses(sender, **kwargs):
+    """Порядок списков по популярности."""
+    invalidate_responses(response_cache.RECIPE_POPULARITY)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Cart)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Cart)
+@receiver(post_delete, sender=Follow)
+def invalidate_user_state_responses(sender, instance, **kwargs):
+    """Состояние пользователя в ответах на условные запросы."""
+    invalidate_responses(conditional.user_state_tag(instance.user_id))
@@ -0,0 +1,89 @@
+import logging
+
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import Follow, User
+
+IMAGE = 'recipes/images/test.png'
+
+
+class ApiTestCase(APITestCase):
+    """Общие данные тестов API: авторы с рецептами и читатель.
+
+    Читатель подписан на всех авторов. Кеш очищается перед
+    каждым тестом, метрики запросов пишутся в лог только
+    при превышении бюджета.
+    """
+    authors_count = 3
+    recipes_per_author = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {i}', slug=f'tag{i}', color='#E26C2D'
+            )
+            for i in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('Абрикос', 'банан', 'сахар', 'соль')
+        ]
+        cls.reader = cls.create_user('reader')
+        cls.authors = [
+            cls.create_user(f'author{i}') for i in range(cls.authors_count)
+        ]
+        cls.recipes = [
+            cls.create_recipe(author, f'Рецепт {author.username} {i}', i)
+            for author in cls.authors
+            for i in range(cls.recipes_per_author)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, following=author)
+
+    @classmethod
+    def create_user(cls, username):
+        return User.objects.create_user(
+            email=f'{username}@example.com',
+            username=username,
+            first_name='Имя',
+            last_name='Фамилия',
+            password='Pa55word-test'
+        )
+
+    @classmethod
+    def create_recipe(cls, author, name, index=0, tags=None,
+                      ingredients=None):
+        recipe = Recipe.objects.create(
+            author=author,
+            name=name,
+            text=f'Описание: {name}',
+            cooking_time=5 + index,
+            image=IMAGE
+        )
+        recipe.tags.set(
+            cls.tags[:1 + index % len(cls.tags)] if tags is None else tags
+        )
+        if ingredients is None:
+            ingredients = cls.ingredients[:2 + index % 3]
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=10)
+            for ingredient in ingredients
+        )
+        return recipe
+
+    def setUp(self):
+        cache.clear()
+        logger = logging.getLogger('api.profiling')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.WARNING)
+        self.guest = APIClient()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=(
+                f'Token {Token.objects.create(user=self.reader).key}'
+            )
+        )
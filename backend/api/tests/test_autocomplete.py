@@ -0,0 +1,47 @@
+from unittest import skipUnless
+
+from django.db import connection
+from api.autocomplete import (
+    ingredient_index, search_in_database, search_ingredients
+)
+from recipes.models import Ingredient
+from .base import ApiTestCase
+
+
+class IngredientAutocompleteTests(ApiTestCase):
+    """Поиск ингредиентов не зависит от регистра названия и запроса."""
+    def get_names(self, params):
+        response = self.guest.get('/api/ingredients/', params)
+        self.assertEqual(response.status_code, 200)
+        results = response.data
+        if isinstance(results, dict):
+            results = results['results']
+        return [ingredient['name'] for ingredient in results]
+
+    def test_memory_index(self):
+        for query in ('абр', 'АБР', 'брик'):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    [item['name'] for item in search_ingredients(query)],
+                    ['Абрикос']
+                )
+        self.assertEqual(self.get_names({'name': 'аБ'}), ['Абрикос'])
+
+    def test_cursor_filter(self):
+        # LOWER в SQLite меняет регистр только латиницы.
+        Ingredient.objects.create(name='Tomato', measurement_unit='г')
+        for query in ('tom', 'TOM'):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    self.get_names({'name': query, 'cursor': ''}),
+                    ['Tomato']
+                )
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен pg_trgm')
+    def test_database_matches_memory_index(self):
+        for query in ('абр', 'АБР', 'брик', 'с'):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    [item['id'] for item in search_in_database(query)],
+                    [item['id'] for item in ingredient_index.search(query)]
+                )
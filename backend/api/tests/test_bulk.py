@@ -0,0 +1,113 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import bulk
+from recipes.models import (
+    Cart, FeedEntry, Favorite, Recipe, ShoppingListExport
+)
+from users.models import Follow
+from .base import ApiTestCase
+
+
+class BulkDeleteTests(ApiTestCase):
+    """Массовое удаление выполняет действия сигналов post_delete."""
+    def test_remove_recipes_updates_counters(self):
+        recipes = self.recipes[:2]
+        ids = [recipe.id for recipe in recipes]
+        for url, field in (
+            ('favorite', 'favorites_count'),
+            ('shopping_cart', 'in_carts_count'),
+        ):
+            with self.subTest(url=url):
+                path = f'/api/recipes/{url}/'
+                response = self.client.post(path, {'ids': ids}, format='json')
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(
+                    list(Recipe.objects.filter(id__in=ids).values_list(
+                        field, flat=True
+                    )),
+                    [1, 1]
+                )
+                response = self.client.delete(
+                    path, {'ids': ids}, format='json'
+                )
+                self.assertEqual(response.status_code, 204)
+                self.assertEqual(
+                    list(Recipe.objects.filter(id__in=ids).values_list(
+                        field, flat=True
+                    )),
+                    [0, 0]
+                )
+
+    def test_remove_recipes_drops_exports(self):
+        recipe = self.recipes[0]
+        Cart.objects.create(user=self.reader, recipe=recipe)
+        ShoppingListExport.objects.create(user=self.reader, format='txt')
+        response = self.client.delete(
+            '/api/recipes/shopping_cart/', {'ids': [recipe.id]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(
+            ShoppingListExport.objects.filter(user=self.reader).exists()
+        )
+
+    def test_remove_followings_trims_feed(self):
+        author = self.authors[0]
+        self.assertTrue(
+            FeedEntry.objects.filter(
+                user=self.reader, author=author
+            ).exists()
+        )
+        self.assertIn(author.id, self.get_feed_authors())
+        response = self.client.delete(
+            '/api/users/subscribe/', {'ids': [author.id]}, format='json'
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(
+            Follow.objects.filter(user=self.reader, following=author).exists()
+        )
+        self.assertFalse(
+            FeedEntry.objects.filter(user=self.reader, author=author).exists()
+        )
+        self.assertNotIn(author.id, self.get_feed_authors())
+
+    def get_feed_authors(self):
+        response = self.client.get('/api/recipes/feed/', {'limit': 100})
+        self.assertEqual(response.status_code, 200)
+        return {recipe['author']['id'] for recipe in response.data['results']}
+
+    def count_queries(self, function, *args):
+        with CaptureQueriesContext(connection) as context:
+            function(*args)
+        return len(context.captured_queries)
+
+    def test_remove_recipes_query_count(self):
+        """Число запросов не зависит от количества рецептов."""
+        for model in (Favorite, Cart):
+            with self.subTest(model=model.__name__):
+                counts = []
+                for recipes in (self.recipes[:1], self.recipes):
+                    ids = [recipe.id for recipe in recipes]
+                    bulk.add_recipes(model, self.reader, ids)
+                    counts.append(self.count_queries(
+                        bulk.remove_recipes, model, self.reader, ids
+                    ))
+                self.assertEqual(counts[0], counts[1])
+                self.assertLessEqual(counts[0], 5)
+
+    def test_remove_followings_query_count(self):
+        counts = [
+            self.count_queries(
+                bulk.remove_followings, self.reader, [author.id]
+            )
+            for author in self.authors[:1]
+        ]
+        bulk.add_followings(self.reader, [self.authors[0].id])
+        counts.append(self.count_queries(
+            bulk.remove_followings,
+            self.reader,
+            [author.id for author in self.authors]
+        ))
+        self.assertEqual(counts[0], counts[1])
+        self.assertLessEqual(counts[0], 4)
@@ -0,0 +1,37 @@
+from recipes.models import Cart, Favorite, Recipe
+from .base import ApiTestCase
+
+
+class RecipeCounterTests(ApiTestCase):
+    """Счётчики избранного и корзины рецепта."""
+    def test_counters_follow_changes(self):
+        recipe = self.recipes[0]
+        for url, field in (
+            ('favorite', 'favorites_count'),
+            ('shopping_cart', 'in_carts_count'),
+        ):
+            with self.subTest(url=url):
+                path = f'/api/recipes/{recipe.id}/{url}/'
+                self.assertEqual(self.client.post(path).status_code, 201)
+                recipe.refresh_from_db()
+                self.assertEqual(getattr(recipe, field), 1)
+                self.assertEqual(self.client.delete(path).status_code, 204)
+                recipe.refresh_from_db()
+                self.assertEqual(getattr(recipe, field), 0)
+
+    def test_decrement_stops_at_zero(self):
+        """Разошедшийся с данными счётчик не уходит ниже нуля."""
+        recipe = self.recipes[0]
+        for model, url, field in (
+            (Favorite, 'favorite', 'favorites_count'),
+            (Cart, 'shopping_cart', 'in_carts_count'),
+        ):
+            with self.subTest(url=url):
+                model.objects.create(user=self.reader, recipe=recipe)
+                Recipe.objects.filter(pk=recipe.pk).update(**{field: 0})
+                response = self.client.delete(
+                    f'/api/recipes/{recipe.id}/{url}/'
+                )
+                self.assertEqual(response.status_code, 204)
+                recipe.refresh_from_db()
+                self.assertEqual(getattr(recipe, field), 0)
@@ -0,0 +1,147 @@
+from django.db.models import Exists, OuterRef
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.fast_serializers import FastIngredientSerializer, FastRecipeSerializer
+from api.serializers import IngredientSerializer, RecipeGetSerializer
+from api.views import RecipeViewSet
+from recipes.models import Cart, Favorite, Ingredient, Recipe
+from .base import ApiTestCase
+
+
+class FastSerializerParityTests(ApiTestCase):
+    """Побайтное совпадение быстрых сериализаторов с DRF."""
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.empty_recipe = cls.create_recipe(
+            cls.authors[0], 'Рецепт без тегов', tags=[], ingredients=[]
+        )
+        Recipe.objects.filter(pk=cls.recipes[0].pk).update(
+            image_variants={'webp': {'320': 'recipes/images/test-320.webp'}}
+        )
+        for recipe in cls.recipes[::2]:
+            Favorite.objects.create(user=cls.reader, recipe=recipe)
+        for recipe in cls.recipes[::3]:
+            Cart.objects.create(user=cls.reader, recipe=recipe)
+
+    def get_context(self, user=None):
+        request = APIRequestFactory().get('/api/recipes/')
+        if user is not None:
+            force_authenticate(request, user)
+        return {'request': Request(request), 'user_state': False}
+
+    def assert_parity(self, serializer, fast_serializer, objects, context):
+        renderer = JSONRenderer()
+        for obj in objects:
+            with self.subTest(pk=obj.pk):
+                self.assertEqual(
+                    renderer.render(serializer(obj, context=context).data),
+                    renderer.render(
+                        fast_serializer(obj, context=context).data
+                    )
+                )
+        self.assertEqual(
+            renderer.render(
+                serializer(objects, many=True, context=context).data
+            ),
+            renderer.render(
+                fast_serializer(objects, many=True, context=context).data
+            )
+        )
+
+    def test_recipes_anonymous(self):
+        self.assert_parity(
+            RecipeGetSerializer,
+            FastRecipeSerializer,
+            list(RecipeViewSet.queryset),
+            self.get_context()
+        )
+
+    def test_recipes_authenticated(self):
+        recipes = list(RecipeViewSet.queryset.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=self.reader, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(Cart.objects.filter(
+                user=self.reader, recipe=OuterRef('pk')
+            ))
+        ))
+        self.assertTrue(any(recipe.is_favorited for recipe in recipes))
+        self.assertTrue(any(recipe.is_in_shopping_cart for recipe in recipes))
+        self.assert_parity(
+            RecipeGetSerializer,
+            FastRecipeSerializer,
+            recipes,
+            self.get_context(self.reader)
+        )
+
+    def test_subscribed_author(self):
+        recipes = list(RecipeViewSet.queryset.filter(author=self.authors[0]))
+        for recipe in recipes:
+            recipe.author.is_subscribed = True
+        self.assert_parity(
+            RecipeGetSerializer,
+            FastRecipeSerializer,
+            recipes,
+            self.get_context(self.reader)
+        )
+
+    def test_recipe_without_tags_and_ingredients(self):
+        recipe = RecipeViewSet.queryset.get(pk=self.empty_recipe.pk)
+        self.assertEqual(
+            FastRecipeSerializer(recipe, context=self.get_context()).data[
+                'ingredients'
+            ],
+            []
+        )
+        self.assert_parity(
+            RecipeGetSerializer,
+            FastRecipeSerializer,
+            [recipe],
+            self.get_context()
+        )
+
+    def test_ingredients(self):
+        self.assert_parity(
+            IngredientSerializer,
+            FastIngredientSerializer,
+            list(Ingredient.objects.all()),
+            self.get_context()
+        )
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class FastSerializerResponseTests(ApiTestCase):
+    """Ответы API с быстрыми сериализаторами и без них совпадают,
+    включая подставленное состояние пользователя."""
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for recipe in cls.recipes[::2]:
+            Favorite.objects.create(user=cls.reader, recipe=recipe)
+            Cart.objects.create(user=cls.reader, recipe=recipe)
+
+    def get_content(self, client, url, fast):
+        with override_settings(FAST_SERIALIZERS=fast):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_responses(self):
+        for url in (
+            '/api/recipes/?limit=100',
+            f'/api/recipes/{self.recipes[0].id}/',
+            '/api/recipes/feed/?limit=100',
+            '/api/ingredients/?cursor=',
+        ):
+            for client in (self.guest, self.client):
+                if 'feed' in url and client is self.guest:
+                    continue
+                with self.subTest(url=url, client=client):
+                    self.assertEqual(
+                        self.get_content(client, url, fast=True),
+                        self.get_content(client, url, fast=False)
+                    )
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+
+from django.core.files.base import ContentFile
+from django.test import override_settings
+
+from recipes.models import Recipe
+from recipes.storage import MEDIA_GRACE_SECONDS
+from .base import ApiTestCase
+
+CONTENT = b'\x89PNG\r\n\x1a\n recipe image'
+
+
+class RecipeImageReleaseTests(ApiTestCase):
+    """Освобождение изображений при удалении рецептов."""
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.storage = Recipe._meta.get_field('image').storage
+
+    def save_image(self):
+        return self.storage.save(
+            'recipes/images/upload.png', ContentFile(CONTENT)
+        )
+
+    def create_recipe_with_image(self, image):
+        recipe = self.create_recipe(self.authors[0], 'С картинкой')
+        Recipe.objects.filter(pk=recipe.pk).update(image=image)
+        recipe.refresh_from_db()
+        return recipe
+
+    def make_old(self, name):
+        old = time.time() - 2 * MEDIA_GRACE_SECONDS
+        os.utime(self.storage.path(name), (old, old))
+
+    def delete_recipe(self, recipe):
+        """Удаление рецепта; освобождение выполняется после фиксации."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            recipe.delete()
+        return callbacks
+
+    def test_unused_image_is_deleted(self):
+        name = self.save_image()
+        recipe = self.create_recipe_with_image(name)
+        self.make_old(name)
+        for callback in self.delete_recipe(recipe):
+            callback()
+        self.assertFalse(self.storage.exists(name))
+
+    def test_reupload_before_release_keeps_file(self):
+        """Тот же файл загружен заново до освобождения: рецепт,
+        который на него сошлётся, не останется без изображения."""
+        name = self.save_image()
+        recipe = self.create_recipe_with_image(name)
+        self.make_old(name)
+        callbacks = self.delete_recipe(recipe)
+        self.assertEqual(self.save_image(), name)
+        for callback in callbacks:
+            callback()
+        self.assertTrue(self.storage.exists(name))
+        recipe = self.create_recipe_with_image(name)
+        with recipe.image.open('rb') as image:
+            self.assertEqual(image.read(), CONTENT)
+
+    def test_reupload_after_release(self):
+        name = self.save_image()
+        recipe = self.create_recipe_with_image(name)
+        for callback in self.delete_recipe(recipe):
+            callback()
+        self.assertEqual(self.save_image(), name)
+        recipe = self.create_recipe_with_image(name)
+        with recipe.image.open('rb') as image:
+            self.assertEqual(image.read(), CONTENT)
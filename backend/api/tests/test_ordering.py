@@ -0,0 +1,32 @@
+from .base import ApiTestCase
+
+
+class RecipeOrderingTests(ApiTestCase):
+    """Сортировки списка рецептов: id в направлении поля сортировки."""
+    def get_ids(self, ordering, **params):
+        response = self.guest.get(
+            '/api/recipes/', {'ordering': ordering, 'limit': 100, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_tiebreaker_follows_direction(self):
+        ids = sorted(recipe.id for recipe in self.recipes)
+        for ordering in ('popularity', 'created'):
+            with self.subTest(ordering=ordering):
+                self.assertEqual(self.get_ids(ordering), ids)
+                self.assertEqual(self.get_ids(f'-{ordering}'), ids[::-1])
+
+    def test_cooking_time_with_author(self):
+        author = self.authors[0]
+        recipes = sorted(
+            (recipe for recipe in self.recipes if recipe.author == author),
+            key=lambda recipe: (recipe.cooking_time, recipe.id)
+        )
+        ids = [recipe.id for recipe in recipes]
+        self.assertEqual(
+            self.get_ids('cooking_time', author=author.id), ids
+        )
+        self.assertEqual(
+            self.get_ids('-cooking_time', author=author.id), ids[::-1]
+        )
@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+
+from api.profiling import QueryBudgetExceeded
+from api.views import RecipeViewSet
+from recipes.models import Cart, Favorite
+from .base import ApiTestCase
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(ApiTestCase):
+    """Бюджеты запросов эндпоинтов при холодном кеше.
+
+    В строгом режиме превышение бюджета вызывает
+    QueryBudgetExceeded, поэтому достаточно успешного ответа.
+    Каждый эндпоинт проверяется со страницей из одного
+    и из всех объектов: число запросов не зависит от размера.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.page_sizes = (1, len(cls.recipes))
+        for recipe in cls.recipes[::2]:
+            Favorite.objects.create(user=cls.reader, recipe=recipe)
+            Cart.objects.create(user=cls.reader, recipe=recipe)
+
+    def assert_within_budget(self, client, url):
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response
+
+    def test_recipe_list(self):
+        for limit in self.page_sizes:
+            for client in (self.guest, self.client):
+                with self.subTest(limit=limit, client=client):
+                    cache.clear()
+                    self.assert_within_budget(
+                        client, f'/api/recipes/?limit={limit}'
+                    )
+            with self.subTest(limit=limit, filters=True):
+                self.assert_within_budget(
+                    self.client,
+                    f'/api/recipes/?limit={limit}&tags=tag0'
+                    f'&is_favorited=1&is_in_shopping_cart=1'
+                )
+
+    def test_recipe_retrieve(self):
+        for client in (self.guest, self.client):
+            with self.subTest(client=client):
+                cache.clear()
+                self.assert_within_budget(
+                    client, f'/api/recipes/{self.recipes[0].id}/'
+                )
+
+    def test_feed(self):
+        for limit in self.page_sizes:
+            with self.subTest(limit=limit):
+                response = self.assert_within_budget(
+                    self.client, f'/api/recipes/feed/?limit={limit}'
+                )
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_subscriptions(self):
+        for limit in (1, len(self.authors)):
+            with self.subTest(limit=limit):
+                response = self.assert_within_budget(
+                    self.client,
+                    f'/api/users/subscriptions/?limit={limit}'
+                    f'&recipes_limit=2'
+                )
+                self.assertEqual(len(response.data['results']), limit)
+
+    def test_users(self):
+        for url in (
+            '/api/users/?limit=1',
+            f'/api/users/?limit={len(self.authors) + 1}',
+            f'/api/users/{self.authors[0].id}/',
+            '/api/users/me/',
+        ):
+            with self.subTest(url=url):
+                cache.clear()
+                self.assert_within_budget(self.client, url)
+
+    def test_reference_data(self):
+        for url in (
+            '/api/tags/',
+            f'/api/tags/{self.tags[0].id}/',
+            '/api/ingredients/',
+            '/api/ingredients/?name=са',
+            f'/api/ingredients/{self.ingredients[0].id}/',
+        ):
+            with self.subTest(url=url):
+                cache.clear()
+                self.assert_within_budget(self.guest, url)
+
+    def test_budget_exceeded(self):
+        with mock.patch.dict(RecipeViewSet.query_budgets, {'list': 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/recipes/')
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_budget_exceeded_not_strict(self):
+        with mock.patch.dict(RecipeViewSet.query_budgets, {'list': 0}):
+            with self.assertLogs('api.profiling', 'WARNING'):
+                response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,28 @@
+from api import reference_cache
+from recipes.models import Ingredient, Tag
+from .base import ApiTestCase
+
+
+class ReferenceCacheInvalidationTests(ApiTestCase):
+    """Версия справочника меняется только после фиксации транзакции."""
+    def test_version_changes_on_commit(self):
+        for cache, create in (
+            (reference_cache.tags, lambda: Tag.objects.create(
+                name='Новый', slug='new', color='#000000'
+            )),
+            (reference_cache.ingredients, lambda: Ingredient.objects.create(
+                name='Новый', measurement_unit='г'
+            )),
+        ):
+            with self.subTest(reference=cache.name):
+                version = cache.get_version()
+                with self.captureOnCommitCallbacks() as callbacks:
+                    create()
+                    self.assertEqual(cache.get_version(), version)
+                self.assertEqual(cache.get_version(), version)
+                for callback in callbacks:
+                    callback()
+                self.assertNotEqual(cache.get_version(), version)
+                self.assertIn(
+                    'Новый', [item['name'] for item in cache.all()]
+                )
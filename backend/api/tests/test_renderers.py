@@ -0,0 +1,53 @@
+import enum
+from collections import OrderedDict
+from unittest import skipIf
+
+from django.utils.safestring import mark_safe
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APISimpleTestCase
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from api.renderers import FastJSONRenderer, orjson
+
+
+class Level(enum.IntEnum):
+    LOW = 1
+
+
+class Name(str):
+    pass
+
+
+@skipIf(orjson is None, 'orjson не установлен')
+class FastJSONRendererTests(APISimpleTestCase):
+    """Вывод FastJSONRenderer совпадает с JSONRenderer."""
+    def test_builtin_subclasses(self):
+        payloads = {
+            'ReturnDict': ReturnDict(
+                [('id', 1), ('name', 'Рецепт')], serializer=None
+            ),
+            'ReturnList': ReturnList(
+                [OrderedDict(id=1), {'id': 2}], serializer=None
+            ),
+            'SafeString': {'html': mark_safe('<b>жирный</b>')},
+            'str': [Name('имя')],
+            'IntEnum': {'level': Level.LOW, 'flag': True},
+            'separators': 'a\u2028b\u2029c',
+        }
+        for name, payload in payloads.items():
+            with self.subTest(payload=name):
+                self.assertEqual(
+                    FastJSONRenderer().render(payload),
+                    JSONRenderer().render(payload)
+                )
+
+    def test_non_finite_floats(self):
+        """Задокументированное отличие: null вместо ValueError."""
+        for value in (float('nan'), float('inf')):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({'value': value})
+                self.assertEqual(
+                    FastJSONRenderer().render({'value': value}),
+                    b'{"value":null}'
+                )
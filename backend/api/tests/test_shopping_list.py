@@ -0,0 +1,135 @@
+import io
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from api.management.commands.process_shopping_list_exports import (
+    EXPORT_ERROR
+)
+from recipes.models import Cart, ShoppingListExport
+from .base import ApiTestCase
+
+URL = '/api/recipes/download_shopping_cart/'
+EXPORTS_URL = '/api/shopping_list_exports/'
+COMMAND_MODULE = 'api.management.commands.process_shopping_list_exports'
+
+
+class ShoppingListDownloadTests(ApiTestCase):
+    """Скачивание списка покупок в разных форматах."""
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for recipe in cls.recipes[:2]:
+            Cart.objects.create(user=cls.reader, recipe=recipe)
+
+    def test_text_formats(self):
+        for file_format, content_type in (
+            ('txt', 'text/plain; charset=utf-8'),
+            ('csv', 'text/csv; charset=utf-8'),
+        ):
+            with self.subTest(format=file_format):
+                response = self.client.get(URL, {'format': file_format})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], content_type)
+                content = b''.join(response.streaming_content).decode()
+                self.assertIn('Абрикос', content)
+
+    def test_pdf(self):
+        response = self.client.get(URL, {'format': 'pdf'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(
+            b''.join(response.streaming_content).startswith(b'%PDF')
+        )
+
+    def test_errors_are_json(self):
+        for file_format in ('txt', 'csv', 'pdf'):
+            with self.subTest(format=file_format):
+                response = self.guest.get(URL, {'format': file_format})
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertIn('detail', response.json())
+
+
+class ShoppingListExportTests(ApiTestCase):
+    """Фоновая выгрузка: ошибки и удаление устаревших файлов."""
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Cart.objects.create(user=cls.reader, recipe=cls.recipes[0])
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_export(self):
+        response = self.client.post(EXPORTS_URL, {'format': 'txt'})
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def process(self):
+        call_command(
+            'process_shopping_list_exports', once=True, stdout=io.StringIO()
+        )
+
+    def test_failed_export_returns_error(self):
+        export_id = self.create_export()
+        with mock.patch(
+            f'{COMMAND_MODULE}.process_export',
+            side_effect=ValueError('/var/lib/media: нет места на диске')
+        ), self.assertLogs(COMMAND_MODULE, 'ERROR') as logs:
+            self.process()
+        self.assertIsInstance(logs.records[0].exc_info[1], ValueError)
+        response = self.client.get(f'{EXPORTS_URL}{export_id}/')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['status'], ShoppingListExport.FAILED)
+        self.assertEqual(response.data['error'], EXPORT_ERROR)
+        self.assertNotIn('/var/lib/media', response.content.decode())
+
+    def test_expired_exports_are_removed(self):
+        first_id = self.create_export()
+        self.process()
+        response = self.client.get(f'{EXPORTS_URL}{first_id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Абрикос', b''.join(response.streaming_content).decode())
+        second_id = self.create_export()
+        name = ShoppingListExport.objects.get(pk=first_id).file.name
+        self.assertEqual(
+            ShoppingListExport.objects.get(pk=second_id).file.name, name
+        )
+        ShoppingListExport.objects.filter(pk=first_id).update(
+            created=timezone.now() - timedelta(days=2)
+        )
+        self.process()
+        self.assertFalse(
+            ShoppingListExport.objects.filter(pk=first_id).exists()
+        )
+        self.assertTrue(default_storage.exists(name))
+        ShoppingListExport.objects.filter(pk=second_id).update(
+            created=timezone.now() - timedelta(days=2)
+        )
+        self.process()
+        self.assertFalse(ShoppingListExport.objects.exists())
+        self.assertFalse(default_storage.exists(name))
+
+    def test_missing_file_is_rendered_again(self):
+        export_id = self.create_export()
+        self.process()
+        default_storage.delete(
+            ShoppingListExport.objects.get(pk=export_id).file.name
+        )
+        response = self.client.get(f'{EXPORTS_URL}{export_id}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], ShoppingListExport.PENDING)
+        self.process()
+        response = self.client.get(f'{EXPORTS_URL}{export_id}/')
+        self.assertEqual(response.status_code, 200)
@@ -5,7 +5,8 @@ from .views import (
     TagViewSet,
     IngredientViewSet,
     RecipeViewSet,
-    CustomUserViewSet
+    CustomUserViewSet,
+    ShoppingListExportViewSet
 )
 
 
@@ -25,6 +26,11 @@ v1_router.register(
     RecipeViewSet,
     basename='recipe'
 )
+v1_router.register(
+    'shopping_list_exports',
+    ShoppingListExportViewSet,
+    basename='shopping_list_exports'
+)
 v1_router.register(
     'users',
     CustomUserViewSet,
@@ -0,0 +1,59 @@
+from django.db.models import CharField, Value
+
+from recipes.models import Cart, Favorite
+from users.models import Follow
+
+FAVORITE = 'favorite'
+CART = 'cart'
+FOLLOW = 'follow'
+
+
+def get_user_state(user, recipe_ids, author_ids):
+    """Избранное, корзина и подписки пользователя одним запросом.
+
+    Выбираются только id из переданных наборов, поэтому
+    размер результата ограничен размером страницы.
+    """
+    state = {FAVORITE: set(), CART: set(), FOLLOW: set()}
+    queries = [
+        model.objects.filter(
+            user=user, recipe_id__in=recipe_ids
+        ).order_by().annotate(
+            kind=Value(kind, output_field=CharField())
+        ).values_list('kind', 'recipe_id')
+        for model, kind in ((Favorite, FAVORITE), (Cart, CART))
+    ]
+    if author_ids:
+        queries.append(
+            Follow.objects.filter(
+                user=user, following_id__in=author_ids
+            ).order_by().annotate(
+                kind=Value(FOLLOW, output_field=CharField())
+            ).values_list('kind', 'following_id')
+        )
+    for kind, pk in queries[0].union(*queries[1:], all=True):
+        state[kind].add(pk)
+    return state
+
+
+def overlay_user_state(recipes, user):
+    """Подстановка is_favorited, is_in_shopping_cart и is_subscribed.
+
+    recipes - сериализованные RecipeGetSerializer данные без
+    состояния пользователя, например из общего кеша ответов.
+    """
+    if not recipes or not user.is_authenticated:
+        return recipes
+    author_ids = {
+        recipe['author']['id'] for recipe in recipes
+    } - {user.id}
+    state = get_user_state(
+        user, [recipe['id'] for recipe in recipes], author_ids
+    )
+    for recipe in recipes:
+        recipe['is_favorited'] = recipe['id'] in state[FAVORITE]
+        recipe['is_in_shopping_cart'] = recipe['id'] in state[CART]
+        recipe['author']['is_subscribed'] = (
+            recipe['author']['id'] in state[FOLLOW]
+        )
+    return recipes
@@ -1,36 +1,110 @@
-from django.db.models import Sum, Prefetch
-from django.http import HttpResponse
-from rest_framework import status, viewsets
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Prefetch, Value
+from django.core.files.storage import default_storage
+from django.http import FileResponse, StreamingHttpResponse
+from rest_framework import mixins, status, viewsets
+from rest_framework.exceptions import NotFound
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from djoser.views import UserViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 
 from users.models import Follow, User
 from recipes.models import (
     Tag, Ingredient,
     Recipe, Cart,
-    Favorite, RecipeIngredient
+    Favorite, RecipeIngredient,
+    ShoppingListExport
 )
 from .filters import IngredientSearchFilter, RecipeSearchFilter
+from . import bulk, conditional, reference_cache, response_cache
+from .autocomplete import search_ingredients
+from .fast_serializers import FastIngredientSerializer, FastRecipeSerializer
 from .permissions import IsAuthorOrReadOnly
+from .user_state import overlay_user_state
+from .shopping_list import (
+    CSVRenderer, PDFRenderer, TXTRenderer,
+    get_digest, get_export_name, get_shopping_list
+)
 from .serializers import (
-    TagSerializer, IngredientSerializer,
-    RecipeSerializer, RecipesShortSerializer,
-    SubscriptionsSerializer
+    BulkIdsSerializer, TagSerializer, IngredientSerializer,
+    RecipeGetSerializer, RecipeSerializer, RecipesShortSerializer,
+    SubscriptionsSerializer, ShoppingListExportSerializer
+)
+from .pagination import (
+    CursorOnlyPagination, CustomPagination, KeysetPagination
 )
-from .pagination import CustomPagination
 
 
 class CustomUserViewSet(UserViewSet):
     """Вьюсет для модели пользователей.
     С реализованным функционалом подписок."""
     pagination_class = CustomPagination
+    query_budgets = {
+        'list': 3,
+        'retrieve': 2,
+        'me': 2,
+        'subscriptions': 4,
+    }
+
+    def conditional_response(self, get_response):
+        """Условный GET по версии данных пользователей."""
+        return conditional.conditional_response(
+            self.request,
+            get_response,
+            response_cache.get_versions([conditional.USERS])
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            lambda: super(CustomUserViewSet, self).list(
+                request, *args, **kwargs
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            lambda: super(CustomUserViewSet, self).retrieve(
+                request, *args, **kwargs
+            )
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.user.is_authenticated:
+            queryset = queryset.with_subscription_status(
+                self.request.user
+            )
+        return queryset
+
+    def get_subscriptions_queryset(self):
+        """Подписки с количеством и последними рецептами авторов.
+
+        Все рецепты страницы выбираются одним запросом,
+        независимо от её размера и значения recipes_limit.
+        """
+        recipes = Recipe.objects.all()
+        if recipes_limit := self.request.query_params.get(
+                'recipes_limit'
+        ):
+            recipes = recipes.limited_per_author(int(recipes_limit))
+        return User.objects.filter(
+            following__user=self.request.user
+        ).annotate(
+            recipes_count=Count('recipes'),
+            is_subscribed=Value(True)
+        ).order_by('id').prefetch_related(
+            Prefetch(
+                'recipes',
+                queryset=recipes,
+                to_attr='limited_recipes'
+            )
+        )
 
     @action(
         ['get'],
@@ -39,12 +113,15 @@ class CustomUserViewSet(UserViewSet):
     )
     def me(self, request):
         """Вывод информации о текущем пользователи."""
-        user = get_object_or_404(
-            User,
-            email=request.user.email
-        )
-        serializer = self.get_serializer(user)
-        return Response(serializer.data)
+        def get_response():
+            user = get_object_or_404(
+                User,
+                email=request.user.email
+            )
+            serializer = self.get_serializer(user)
+            return Response(serializer.data)
+
+        return self.conditional_response(get_response)
 
     @action(
         methods=['get'],
@@ -52,20 +129,26 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscriptions(self, request):
         """Вывод списка подписок пользователя."""
-        user = request.user
-        following = User.objects.filter(
-            following__user=user
+        started = time.time_ns()
+        paginate = self.paginate_queryset(
+            self.get_subscriptions_queryset()
         )
-        paginate = self.paginate_queryset(following)
         serializer = SubscriptionsSerializer(
-            data=paginate,
+            paginate,
             many=True,
             context={
                 'request': request
             }
         )
-        serializer.is_valid()
-        return self.get_paginated_response(serializer.data)
+        response = self.get_paginated_response(serializer.data)
+        return conditional.validated_response(
+            request,
+            response,
+            response_cache.get_versions(sorted(frozenset(
+                response_cache.get_subscriptions_tags(response.data)
+            ))),
+            started
+        )
 
     @action(
         methods=['post'],
@@ -82,20 +165,19 @@ class CustomUserViewSet(UserViewSet):
                 'Вы пытаетесь подписаться на себя.',
                 status=status.HTTP_400_BAD_REQUEST
             )
-        if Follow.objects.filter(
-                user=request.user,
-                following=user
-        ).first():
+        try:
+            with transaction.atomic():
+                Follow.objects.create(
+                    user=request.user,
+                    following=user
+                )
+        except IntegrityError:
             return Response(
                 data='Вы уже подписаны.',
                 status=status.HTTP_400_BAD_REQUEST
             )
-        Follow.objects.create(
-            user=request.user,
-            following=user
-        )
         serializer = SubscriptionsSerializer(
-            user,
+            self.get_subscriptions_queryset().get(id=user.id),
             context={
                 'request': request
             }
@@ -123,30 +205,131 @@ class CustomUserViewSet(UserViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='subscribe',
+        permission_classes=(IsAuthenticated,)
+    )
+    def bulk_subscribe(self, request):
+        """Массовая подписка/отписка: {"ids": [...]}."""
+        serializer = BulkIdsSerializer(
+            data=request.data,
+            context={'queryset': User.objects.all()}
+        )
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        if request.method == 'DELETE':
+            bulk.remove_followings(request.user, ids)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        if request.user.id in ids:
+            return Response(
+                'Вы пытаетесь подписаться на себя.',
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        bulk.add_followings(request.user, ids)
+        serializer = SubscriptionsSerializer(
+            self.get_subscriptions_queryset().filter(id__in=ids),
+            many=True,
+            context={
+                'request': request
+            }
+        )
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+class ReferenceCacheMixin:
+    """Ответы справочников из кеша.
+
+    Условные запросы проверяются по версии справочника,
+    одной на все его записи.
+    """
+    reference_cache = None
+    cache_control = 'public, max-age=60'
+
+    def conditional_response(self, get_response):
+        return conditional.conditional_response(
+            self.request,
+            get_response,
+            [self.reference_cache.get_version()],
+            personal=False,
+            cache_control=self.cache_control
+        )
+
+    def cached_response(self, data):
+        return self.conditional_response(lambda: Response(data))
+
+    def get_cached_list(self):
+        return self.reference_cache.all()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            lambda: Response(self.get_cached_list())
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            item = self.reference_cache.get(int(kwargs.get('pk')))
+        except ValueError:
+            item = None
+        if item is None:
+            raise NotFound
+        return self.cached_response(item)
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+
+class TagViewSet(ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для модели Таг."""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
+    reference_cache = reference_cache.tags
+    query_budgets = {'list': 2, 'retrieve': 2}
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
-    """Вьюсет для модели ингредиентов."""
+class IngredientViewSet(ReferenceCacheMixin,
+                        viewsets.ReadOnlyModelViewSet):
+    """Вьюсет для модели ингредиентов.
+    Курсорная пагинация выполняется по БД, минуя кеш."""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (AllowAny,)
+    pagination_class = CursorOnlyPagination
     filter_backends = (
         DjangoFilterBackend,
     )
     filterset_class = IngredientSearchFilter
+    reference_cache = reference_cache.ingredients
+    query_budgets = {'list': 2, 'retrieve': 2}
+
+    def get_serializer_class(self):
+        if settings.FAST_SERIALIZERS:
+            return FastIngredientSerializer
+        return super().get_serializer_class()
+
+    def get_cached_list(self):
+        """Автодополнение по названию или полный список."""
+        if name := self.request.query_params.get('name'):
+            return search_ingredients(name)
+        return super().get_cached_list()
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator.cursor_query_param in request.query_params:
+            return self.conditional_response(
+                lambda: super(ReferenceCacheMixin, self).list(
+                    request, *args, **kwargs
+                )
+            )
+        return super().list(request, *args, **kwargs)
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
     """Вьюсет для модели Recip.
     С реализованным функционалом избранных рецептом
     и скачивание списка покупок."""
-    queryset = Recipe.objects.all().select_related(
+    queryset = Recipe.objects.defer('search_vector').select_related(
         'author'
     ).prefetch_related(
         'tags',
@@ -154,8 +337,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             'recipe_ingredient',
             queryset=RecipeIngredient.objects.select_related(
                 'ingredient'
-            ),
-            to_attr='ingredients'
+            )
         )
     )
     pagination_class = CustomPagination
@@ -164,20 +346,125 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeSearchFilter
     http_method_names = ['get', 'post', 'patch', 'delete']
+    count_cache_prefix = 'recipes'
+    count_cache_user_params = ('is_favorited', 'is_in_shopping_cart')
+    # Не зависят от размера страницы. Учтены запрос токена
+    # и загрузка холодных кешей тегов и количества рецептов.
+    query_budgets = {
+        'list': 7,
+        'retrieve': 6,
+        'feed': 6,
+    }
 
-    def get_queryset(self):
-        queryset = self.queryset
-        if self.request.user.is_authenticated:
-            queryset = queryset.with_favorited_and_in_cart_status(
-                self.request.user
+    def get_serializer_class(self):
+        if self.action in ('list', 'retrieve', 'feed'):
+            if settings.FAST_SERIALIZERS:
+                return FastRecipeSerializer
+            return RecipeGetSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        """Ответы собираются без состояния пользователя,
+        оно подставляется после сериализации (api.user_state)."""
+        return {**super().get_serializer_context(), 'user_state': False}
+
+    def with_user_state(self, response, get_recipes):
+        """Подстановка состояния пользователя в данные ответа."""
+        if status.is_success(response.status_code):
+            overlay_user_state(get_recipes(response.data), self.request.user)
+        return response
+
+    def cached_response(self, get_response, get_tags, shared=True):
+        """Ответ через общий кеш ответов и условные запросы.
+
+        Без состояния пользователя данные одинаковы для всех,
+        поэтому кешируются по параметрам запроса и сбрасываются
+        по тегам зависимостей (api.signals). Версии тех же тегов
+        служат валидаторами, так что попадание в кеш и ответ 304
+        обходятся без запросов к БД. shared=False - данные зависят
+        от пользователя и не кешируются, но валидаторы выдаются.
+        """
+        request = self.request
+        cached = shared and settings.RESPONSE_CACHE_TIMEOUT
+        key = response_cache.get_key(request)
+        if cached and (entry := response_cache.load(key)):
+            data, versions = entry
+            validators = conditional.Validators(request, versions)
+            if response := validators.not_modified():
+                return response
+            response = validators.apply(Response(data))
+            response['X-Cache'] = response_cache.HIT
+            return response
+        started = time.time_ns()
+        response = get_response()
+        if cached:
+            response['X-Cache'] = response_cache.MISS
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        tags = get_tags(response.data)
+        if cached:
+            versions = response_cache.store(key, response.data, tags)
+        else:
+            versions = response_cache.get_versions(sorted(frozenset(tags)))
+        return conditional.validated_response(
+            request, response, versions, started
+        )
+
+    def list(self, request, *args, **kwargs):
+        response = self.cached_response(
+            lambda: super(RecipeViewSet, self).list(request, *args, **kwargs),
+            lambda data: response_cache.get_page_tags(request, data),
+            shared=not request.user.is_authenticated or not any(
+                param in request.query_params
+                for param in self.count_cache_user_params
             )
-        return queryset
+        )
+        return self.with_user_state(response, lambda data: data['results'])
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.cached_response(
+            lambda: super(RecipeViewSet, self).retrieve(
+                request, *args, **kwargs
+            ),
+            response_cache.get_recipe_tags
+        )
+        return self.with_user_state(response, lambda data: [data])
+
+    def update(self, request, *args, **kwargs):
+        return self.with_user_state(
+            super().update(request, *args, **kwargs), lambda data: [data]
+        )
 
     def perform_create(self, serializer):
         serializer.save(
             author=self.request.user
         )
 
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=(IsAuthenticated,),
+        pagination_class=KeysetPagination
+    )
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь.
+        Страница читается из таблицы ленты курсором по id рецепта."""
+        def get_response():
+            queryset = self.filter_queryset(
+                self.get_queryset().filter(feed_entries__user=request.user)
+            )
+            page = self.paginate_queryset(queryset)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        response = self.cached_response(
+            get_response,
+            lambda data: response_cache.get_page_tags(request, data),
+            shared=False
+        )
+        return self.with_user_state(response, lambda data: data['results'])
+
+    @transaction.atomic
     def create_object(
             self, model, text, serializer
     ):
@@ -189,17 +476,17 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'Рецепт не существует.',
                 status=status.HTTP_400_BAD_REQUEST
             )
-        if model.objects.filter(
-                recipe=recipe, user=self.request.user
-        ).exists():
+        try:
+            with transaction.atomic():
+                model.objects.create(
+                    recipe=recipe,
+                    user=self.request.user
+                )
+        except IntegrityError:
             return Response(
                 f'Рецепт уже в {text}.',
                 status=status.HTTP_400_BAD_REQUEST
             )
-        model.objects.create(
-            recipe=recipe,
-            user=self.request.user
-        )
         serializer = serializer(
             recipe,
             context={
@@ -211,6 +498,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
 
+    @transaction.atomic
     def delete_object(
             self, model, text
     ):
@@ -229,6 +517,30 @@ class RecipeViewSet(viewsets.ModelViewSet):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    def bulk_update_objects(self, model):
+        """Массовое добавление/удаление рецептов: {"ids": [...]}."""
+        serializer = BulkIdsSerializer(
+            data=self.request.data,
+            context={'queryset': Recipe.objects.all()}
+        )
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        if self.request.method == 'DELETE':
+            bulk.remove_recipes(model, self.request.user, ids)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        bulk.add_recipes(model, self.request.user, ids)
+        serializer = RecipesShortSerializer(
+            Recipe.objects.filter(id__in=ids),
+            many=True,
+            context={
+                'request': self.request
+            }
+        )
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED
+        )
+
     @action(
         methods=['post'],
         detail=True
@@ -272,41 +584,98 @@ class RecipeViewSet(viewsets.ModelViewSet):
             text=text
         )
 
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='favorite',
+        permission_classes=(IsAuthenticated,)
+    )
+    def bulk_favorite(self, request):
+        """Массовое изменение избранного."""
+        return self.bulk_update_objects(Favorite)
+
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='shopping_cart',
+        permission_classes=(IsAuthenticated,)
+    )
+    def bulk_shopping_cart(self, request):
+        """Массовое изменение корзины."""
+        return self.bulk_update_objects(Cart)
+
     @action(
         detail=False,
         methods=['get'],
-        pagination_class=IsAuthenticated
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=(PDFRenderer, TXTRenderer, CSVRenderer)
     )
     def download_shopping_cart(self, request):
-        """Скачивание списка покупок в PDF."""
-        recipes = Recipe.objects.filter(
-            cart_recipes__user=request.user
+        """Скачивание списка покупок (?format=pdf|txt|csv)."""
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(
+                get_shopping_list(request.user).iterator()
+            ),
+            content_type=renderer.content_type
         )
-        ingredients = Ingredient.objects.filter(
-            recipe_ingredient__recipe__in=recipes
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping_list.{renderer.format}"'
         )
-        queryset_ingredients = ingredients.annotate(
-            sum_amount_ingredients=(
-                Sum('recipe_ingredient__amount')
-            )
+        return response
+
+
+class ShoppingListExportViewSet(mixins.CreateModelMixin,
+                                mixins.RetrieveModelMixin,
+                                viewsets.GenericViewSet):
+    """Вьюсет для фоновой выгрузки списка покупок.
+    Файлы формирует команда process_shopping_list_exports."""
+    serializer_class = ShoppingListExportSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return self.request.user.shopping_list_exports.all()
+
+    def perform_create(self, serializer):
+        """Постановка задачи в очередь.
+        Если файл с таким содержимым уже есть, задача сразу готова."""
+        file_format = serializer.validated_data['format']
+        digest = get_digest(
+            get_shopping_list(self.request.user), file_format
         )
-        response = HttpResponse(content_type='application/pdf')
-        pdfmetrics.registerFont(
-            TTFont(
-                'FreeSans',
-                'static/fonts/FreeSans.ttf'
+        name = get_export_name(digest, file_format)
+        if default_storage.exists(name):
+            serializer.save(
+                user=self.request.user,
+                digest=digest,
+                file=name,
+                status=ShoppingListExport.DONE
+            )
+        else:
+            serializer.save(user=self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Готовый файл, ошибка или текущий статус задачи.
+        Файл, удалённый при очистке устаревших выгрузок,
+        формируется заново."""
+        export = self.get_object()
+        if export.status == ShoppingListExport.FAILED:
+            return Response(
+                self.get_serializer(export).data,
+                status=status.HTTP_409_CONFLICT
             )
+        if export.status == ShoppingListExport.DONE and not (
+            export.file.storage.exists(export.file.name)
+        ):
+            export.status = ShoppingListExport.PENDING
+            export.save(update_fields=['status'])
+        if export.status != ShoppingListExport.DONE:
+            return Response(
+                self.get_serializer(export).data,
+                status=status.HTTP_202_ACCEPTED
+            )
+        return FileResponse(
+            export.file.open('rb'),
+            as_attachment=True,
+            filename=f'shopping_list.{export.format}'
         )
-        pdf_canvas = canvas.Canvas(response)
-        text_object = pdf_canvas.beginText(100, 730)
-        text_object.setFont('FreeSans', 12)
-        text_object.textLine('Список покупок:')
-        for ingredient in queryset_ingredients:
-            pdf_text = (f'{ingredient.name} '
-                        f'({ingredient.measurement_unit}) — '
-                        f'{ingredient.sum_amount_ingredients}')
-            text_object.textLine(pdf_text)
-        pdf_canvas.drawText(text_object)
-        pdf_canvas.setTitle('Ваш список покупок')
-        pdf_canvas.save()
-        return response
@@ -16,6 +16,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'djoser',
@@ -27,6 +28,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -102,6 +104,60 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 AUTH_USER_MODEL = 'users.User'
 
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', 5 * 1024 * 1024)
+)
+
+# Метрики запросов: заголовок Server-Timing, лог api.profiling,
+# профили cProfile (?profile=1 при DEBUG или с X-Profile-Token
+# и случайная выборка PROFILE_SAMPLE_RATE) и бюджеты запросов вьюсетов.
+SERVER_TIMING = DEBUG or bool(os.getenv('SERVER_TIMING'))
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', 500))
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN')
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+QUERY_BUDGET_STRICT = bool(os.getenv('QUERY_BUDGET_STRICT'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.profiling': {
+            'handlers': ['console'],
+            'level': os.getenv('PROFILING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Общий кеш процессов: Redis-совместимый сервер при заданном REDIS_URL,
+# иначе память процесса.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+
+# Сериализация рецептов и ингредиентов при чтении без полей DRF
+# (api.fast_serializers), вывод совпадает с сериализаторами DRF.
+FAST_SERIALIZERS = not os.getenv('DISABLE_FAST_SERIALIZERS')
+
+# Время жизни закешированных ответов анонимам, 0 - кеш выключен.
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Время хранения завершённых выгрузок списка покупок, в секундах.
+# Устаревшие задачи и их файлы удаляет process_shopping_list_exports.
+SHOPPING_LIST_EXPORT_TTL = int(
+    os.getenv('SHOPPING_LIST_EXPORT_TTL', 24 * 60 * 60)
+)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
@@ -113,9 +169,21 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 
+# memory - индекс в памяти процесса, database - поиск через pg_trgm.
+INGREDIENT_AUTOCOMPLETE = os.getenv('INGREDIENT_AUTOCOMPLETE', 'memory')
+
 DJOSER = {
     'SERIALIZERS': {
         'user': 'api.serializers.CustomUserSerializer',
@@ -3,7 +3,7 @@ from import_export.admin import ImportExportActionModelAdmin
 
 from .models import (
     Recipe, Tag, Ingredient, Favorite,
-    RecipeIngredient, Cart
+    RecipeIngredient, Cart, ShoppingListExport
 )
 
 
@@ -16,10 +16,16 @@ def trim_field_text(obj):
     return obj.text
 
 
-@admin.display(description='Избранное')
+@admin.display(description='Избранное', ordering='favorites_count')
 def favorite_count(obj):
     """Количество добавлений в избранное."""
-    return obj.favorite_recipe.count()
+    return obj.favorites_count
+
+
+@admin.display(description='В корзинах', ordering='in_carts_count')
+def cart_count(obj):
+    """Количество добавлений в корзину."""
+    return obj.in_carts_count
 
 
 class IngredientInline(admin.TabularInline):
@@ -31,13 +37,18 @@ class IngredientInline(admin.TabularInline):
 class RecipAdmin(admin.ModelAdmin):
     list_display = (
         'id', 'name', 'cooking_time',
-        trim_field_text, 'author', favorite_count
+        trim_field_text, 'author', favorite_count, cart_count
     )
     list_editable = ('name', 'cooking_time')
     list_filter = ('name', 'author', 'tags')
     search_fields = ('name', 'cooking_time')
     inlines = [IngredientInline]
 
+    def save_model(self, request, obj, form, change):
+        if 'image' in form.changed_data:
+            obj.image_variants = None
+        super().save_model(request, obj, form, change)
+
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
@@ -66,3 +77,9 @@ class CartAdmin(admin.ModelAdmin):
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'recipe')
     list_filter = ('user', 'recipe')
+
+
+@admin.register(ShoppingListExport)
+class ShoppingListExportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'format', 'status', 'created')
+    list_filter = ('status', 'format')
@@ -0,0 +1,53 @@
+from users.models import Follow
+from .models import FeedEntry, Recipe
+
+FEED_BACKFILL_SIZE = 100
+FEED_BATCH_SIZE = 1000
+
+
+def fan_out(recipe):
+    """Запись рецепта в ленты всех подписчиков автора."""
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe.pk,
+                author_id=recipe.author_id
+            )
+            for user_id in Follow.objects.filter(
+                following_id=recipe.author_id
+            ).values_list('user_id', flat=True).iterator()
+        ),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill(user_id, author_ids):
+    """Добавление в ленту последних рецептов авторов.
+
+    Рецепты всех авторов выбираются одним запросом.
+    """
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id
+            )
+            for recipe_id, author_id in Recipe.objects.filter(
+                author_id__in=author_ids
+            ).limited_per_author(
+                FEED_BACKFILL_SIZE
+            ).values_list('id', 'author_id')
+        ),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def trim(user_id, author_ids):
+    """Удаление из ленты рецептов авторов."""
+    FeedEntry.objects.filter(
+        user_id=user_id, author_id__in=author_ids
+    ).delete()
@@ -0,0 +1,41 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from PIL import Image
+
+IMAGE_VARIANT_WIDTHS = (320, 640)
+IMAGE_VARIANT_FORMATS = {
+    'jpeg': 'jpg',
+    'webp': 'webp',
+}
+IMAGE_VARIANT_QUALITY = 80
+
+
+def build_image_variants(recipe):
+    """Уменьшенные копии изображения рецепта в JPEG и WebP.
+
+    Возвращает словарь {формат: {ширина: имя файла}}.
+    """
+    storage = recipe.image.storage
+    base_name = os.path.splitext(recipe.image.name)[0]
+    with recipe.image.open('rb') as image_file:
+        image = Image.open(image_file)
+        image.load()
+    image = image.convert('RGB')
+    variants = {}
+    for width in IMAGE_VARIANT_WIDTHS:
+        resized = image.copy()
+        resized.thumbnail((width, image.height))
+        for image_format, extension in IMAGE_VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(
+                buffer, image_format, quality=IMAGE_VARIANT_QUALITY
+            )
+            variants.setdefault(image_format, {})[str(width)] = (
+                storage.save(
+                    f'{base_name}-{width}.{extension}',
+                    ContentFile(buffer.getvalue())
+                )
+            )
+    return variants
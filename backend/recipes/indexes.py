@@ -0,0 +1,32 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.db.backends.ddl_references import Statement
+from django.db.models import Index
+
+
+class PostgresOnlyIndexMixin:
+    """Индекс, который создаётся только в PostgreSQL.
+
+    На остальных СУБД (SQLite при разработке и в тестах) вместо
+    CREATE/DROP INDEX выполняется пустая инструкция: классы
+    операторов и GIN там не поддерживаются.
+    """
+    def is_supported(self, schema_editor):
+        return schema_editor.connection.vendor == 'postgresql'
+
+    def create_sql(self, model, schema_editor, *args, **kwargs):
+        if not self.is_supported(schema_editor):
+            return Statement('')
+        return super().create_sql(model, schema_editor, *args, **kwargs)
+
+    def remove_sql(self, model, schema_editor, *args, **kwargs):
+        if not self.is_supported(schema_editor):
+            return Statement('')
+        return super().remove_sql(model, schema_editor, *args, **kwargs)
+
+
+class PostgresOnlyIndex(PostgresOnlyIndexMixin, Index):
+    """B-tree индекс только для PostgreSQL."""
+
+
+class PostgresOnlyGinIndex(PostgresOnlyIndexMixin, GinIndex):
+    """GIN индекс только для PostgreSQL."""
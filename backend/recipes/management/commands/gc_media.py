@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe, ShoppingListExport
+from recipes.storage import MEDIA_GRACE_SECONDS, get_file_names
+
+MEDIA_DIRECTORIES = ('recipes/images', 'shopping_lists')
+
+
+class Command(BaseCommand):
+    help = 'Удаление медиафайлов, на которые не ссылается ни одна запись.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести файлы, которые будут удалены.'
+        )
+        parser.add_argument(
+            '--grace-minutes',
+            type=int,
+            default=MEDIA_GRACE_SECONDS // 60,
+            help=('Не трогать файлы моложе указанного времени: '
+                  'их запись может быть ещё не сохранена.')
+        )
+
+    def get_referenced(self):
+        referenced = set()
+        for name, variants in Recipe.objects.values_list(
+                'image', 'image_variants'
+        ).iterator():
+            referenced.update(get_file_names(name, variants))
+        referenced.update(
+            ShoppingListExport.objects.exclude(
+                file=''
+            ).values_list('file', flat=True)
+        )
+        return referenced
+
+    def handle(self, *args, **options):
+        storage = Recipe._meta.get_field('image').storage
+        referenced = self.get_referenced()
+        threshold = time.time() - options['grace_minutes'] * 60
+        removed = 0
+        for directory in MEDIA_DIRECTORIES:
+            if not storage.exists(directory):
+                continue
+            for file_name in storage.listdir(directory)[1]:
+                name = f'{directory}/{file_name}'
+                if name in referenced:
+                    continue
+                if storage.get_modified_time(name).timestamp() > threshold:
+                    continue
+                self.stdout.write(name)
+                if not options['dry_run']:
+                    storage.delete(name)
+                removed += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Неиспользуемых файлов: {removed}')
+        )
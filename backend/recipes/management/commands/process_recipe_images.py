@@ -0,0 +1,70 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import response_cache
+from recipes.images import build_image_variants
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ('Формирование уменьшенных копий и WebP-версий '
+            'изображений рецептов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать очередь один раз и завершиться.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Пауза между опросами пустой очереди, в секундах.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20,
+            help='Количество рецептов, обрабатываемых за один раз.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.process_batch(options['batch_size'])
+            if processed:
+                self.stdout.write(f'Обработано изображений: {processed}')
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
+
+    def process_batch(self, batch_size):
+        """Обработка рецептов, у которых ещё нет копий изображения.
+        При ошибке сохраняется пустой словарь, чтобы не повторять её."""
+        recipes = Recipe.objects.filter(
+            image_variants__isnull=True
+        ).only('id', 'image')[:batch_size]
+        processed = []
+        for recipe in recipes:
+            try:
+                variants = build_image_variants(recipe)
+            except Exception:
+                logger.exception(
+                    'Не удалось обработать изображение рецепта %s',
+                    recipe.id
+                )
+                variants = {}
+            Recipe.objects.filter(
+                pk=recipe.pk, image=recipe.image.name
+            ).update(image_variants=variants)
+            processed.append(recipe.pk)
+        if processed:
+            response_cache.invalidate(
+                *map(response_cache.recipe_tag, processed)
+            )
+        return len(processed)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes import feed
+from recipes.models import FeedEntry
+from users.models import Follow
+
+
+class Command(BaseCommand):
+    help = 'Пересборка лент подписок по текущим подпискам.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            FeedEntry.objects.all().delete()
+            follows = Follow.objects.values_list(
+                'user_id', 'following_id'
+            )
+            for user_id, author_id in follows.iterator():
+                feed.backfill(user_id, [author_id])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Записей в лентах: {FeedEntry.objects.count()}'
+            )
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from recipes.models import Cart, Favorite, Recipe, count_subquery
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт счётчиков избранного и корзин у рецептов.'
+
+    def handle(self, *args, **options):
+        drifted = Recipe.objects.annotate(
+            actual_favorites=count_subquery(Favorite),
+            actual_carts=count_subquery(Cart)
+        ).filter(
+            ~Q(favorites_count=F('actual_favorites'))
+            | ~Q(in_carts_count=F('actual_carts'))
+        )
+        updated = Recipe.objects.filter(
+            pk__in=drifted.values('pk')
+        ).recount_stats()
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено рецептов: {updated}')
+        )
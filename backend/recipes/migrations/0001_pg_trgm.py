@@ -0,0 +1,11 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Расширение pg_trgm для триграммных индексов и поиска
+    ингредиентов. На других СУБД операция пропускается."""
+
+    operations = [
+        TrigramExtension(),
+    ]
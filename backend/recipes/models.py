@@ -1,26 +1,74 @@
-from django.db import models
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connections, models
+from django.db.models.functions import Coalesce, Lower
 from django.core.validators import MinValueValidator
 from users.models import User
+from .indexes import PostgresOnlyGinIndex, PostgresOnlyIndex
+from .storage import ContentAddressedStorage
+
+SEARCH_CONFIG = 'russian'
+
+
+def count_subquery(model):
+    """Фактическое количество строк model для рецепта."""
+    return Coalesce(
+        models.Subquery(
+            model.objects.filter(
+                recipe=models.OuterRef('pk')
+            ).order_by().values('recipe').annotate(
+                total=models.Count('id')
+            ).values('total')
+        ),
+        0
+    )
 
 
 class RecipeQuerySet(models.QuerySet):
     """Кастомный QuerySet для модели рецептов."""
-    def with_favorited_and_in_cart_status(self, user):
-        return self.annotate(
-            is_favorited=models.Exists(
-                Favorite.objects.filter(
-                    recipe=models.OuterRef('pk'),
-                    user=user
-                )
-            ),
-            is_in_shopping_cart=models.Exists(
-                Cart.objects.filter(
-                    recipe=models.OuterRef('pk'),
-                    user=user
+    def update_search_vector(self):
+        """Пересчёт поискового вектора рецептов.
+
+        Вес A - название, B - описание, C - названия ингредиентов.
+        На других СУБД, кроме PostgreSQL, ничего не делает.
+        """
+        if connections[self.db].vendor != 'postgresql':
+            return 0
+        ingredient_names = models.Subquery(
+            RecipeIngredient.objects.filter(
+                recipe=models.OuterRef('pk')
+            ).order_by().values('recipe').annotate(
+                names=StringAgg('ingredient__name', ' ')
+            ).values('names')
+        )
+        return self.update(
+            search_vector=(
+                SearchVector('name', weight='A', config=SEARCH_CONFIG)
+                + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+                + SearchVector(
+                    ingredient_names, weight='C', config=SEARCH_CONFIG
                 )
             )
         )
 
+    def recount_stats(self):
+        """Пересчёт счётчиков избранного и корзин одним запросом."""
+        return self.update(
+            favorites_count=count_subquery(Favorite),
+            in_carts_count=count_subquery(Cart)
+        )
+
+    def limited_per_author(self, limit):
+        """Не более limit последних рецептов каждого автора."""
+        return self.filter(
+            id__in=models.Subquery(
+                Recipe.objects.filter(
+                    author=models.OuterRef('author')
+                ).order_by('-id').values('id')[:limit]
+            )
+        )
+
 
 class Tag(models.Model):
     """Модель тега."""
@@ -62,6 +110,22 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [models.UniqueConstraint(
+            fields=['name', 'measurement_unit'],
+            name='unique_ingredient'
+        )]
+        # Поиск по названию без учёта регистра (api.autocomplete).
+        # gin_trgm_ops требует расширения pg_trgm (migrations/0001_pg_trgm).
+        indexes = [
+            PostgresOnlyIndex(
+                OpClass(Lower('name'), name='varchar_pattern_ops'),
+                name='ingredient_name_pattern_idx'
+            ),
+            PostgresOnlyGinIndex(
+                OpClass(Lower('name'), name='gin_trgm_ops'),
+                name='ingredient_name_trgm_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -88,6 +152,12 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to='recipes/images/',
+        storage=ContentAddressedStorage()
+    )
+    image_variants = models.JSONField(
+        null=True,
+        editable=False,
+        verbose_name='Уменьшенные копии изображения'
     )
     cooking_time = models.IntegerField(
         validators=[
@@ -109,6 +179,25 @@ class Recipe(models.Model):
         verbose_name='Автор',
         help_text='Укажите автора'
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата публикации'
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В корзинах'
+    )
     objects = models.Manager.from_queryset(
         RecipeQuerySet
     )()
@@ -117,6 +206,46 @@ class Recipe(models.Model):
         ordering = ('-id',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            # Сортировки списка: поле сортировки и id в том же
+            # направлении (api.filters.RecipeOrderingFilter), индекс
+            # читается в обе стороны. Для фильтра по автору - те же
+            # индексы с автором впереди, без сортировки - индекс
+            # внешнего ключа author.
+            models.Index(
+                fields=['favorites_count', 'id'],
+                name='recipe_popularity_idx'
+            ),
+            models.Index(
+                fields=['cooking_time', 'id'],
+                name='recipe_cooking_time_idx'
+            ),
+            models.Index(
+                fields=['created', 'id'],
+                name='recipe_created_idx'
+            ),
+            models.Index(
+                fields=['author', 'favorites_count', 'id'],
+                name='recipe_author_popularity_idx'
+            ),
+            models.Index(
+                fields=['author', 'cooking_time', 'id'],
+                name='recipe_author_cooking_time_idx'
+            ),
+            models.Index(
+                fields=['author', 'created', 'id'],
+                name='recipe_author_created_idx'
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx'
+            ),
+            models.Index(
+                fields=['id'],
+                name='recipe_image_pending_idx',
+                condition=models.Q(image_variants__isnull=True)
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -197,3 +326,96 @@ class Cart(models.Model):
             fields=['user', 'recipe'],
             name='unique_cart'
         )]
+
+
+class ShoppingListExport(models.Model):
+    """Задача на формирование файла списка покупок."""
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_exports',
+        verbose_name='Пользователь'
+    )
+    format = models.CharField(
+        max_length=3,
+        verbose_name='Формат файла'
+    )
+    status = models.CharField(
+        max_length=7,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    digest = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name='Хеш содержимого'
+    )
+    file = models.FileField(
+        upload_to='shopping_lists/',
+        blank=True,
+        verbose_name='Файл'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Причина ошибки'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Выгрузка списка покупок'
+        verbose_name_plural = 'Выгрузки списков покупок'
+        indexes = [
+            models.Index(
+                fields=['status', 'id'],
+                name='shopping_export_status_idx'
+            )
+        ]
+
+
+class FeedEntry(models.Model):
+    """Запись ленты: рецепт автора, на которого подписан пользователь."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'recipe'],
+            name='unique_feed_entry'
+        )]
+        indexes = [
+            models.Index(
+                fields=['user', 'author'],
+                name='feed_entry_user_author_idx'
+            ),
+        ]
@@ -0,0 +1,126 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.models import Follow
+from . import feed
+from .models import (
+    Cart, Favorite, Ingredient, Recipe, RecipeIngredient, ShoppingListExport
+)
+from .storage import get_file_names
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    Cart: 'in_carts_count',
+}
+
+
+def update_recipe_counter(model, recipe_id, delta):
+    """Атомарное изменение счётчика рецепта через F().
+
+    Счётчик мог разойтись с данными, поэтому значение не опускается
+    ниже нуля: иначе сработало бы ограничение PositiveIntegerField.
+    """
+    field = RECIPE_COUNTERS[model]
+    Recipe.objects.filter(pk=recipe_id).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=Cart)
+def increment_recipe_counter(sender, instance, created, **kwargs):
+    """Увеличение счётчика при добавлении в избранное/корзину."""
+    if created:
+        update_recipe_counter(sender, instance.recipe_id, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=Cart)
+def decrement_recipe_counter(sender, instance, **kwargs):
+    """Уменьшение счётчика при удалении из избранного/корзины."""
+    update_recipe_counter(sender, instance.recipe_id, -1)
+
+
+@receiver(post_save, sender=Cart)
+@receiver(post_delete, sender=Cart)
+def invalidate_shopping_list_exports(sender, instance, **kwargs):
+    """Сброс готовых выгрузок списка покупок при изменении корзины."""
+    ShoppingListExport.objects.filter(user_id=instance.user_id).delete()
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def update_recipe_search_vector(sender, instance, **kwargs):
+    """Обновление поискового вектора рецепта."""
+    recipe_id = instance.pk if sender is Recipe else instance.recipe_id
+    Recipe.objects.filter(pk=recipe_id).update_search_vector()
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes_search_vector(sender, instance, created,
+                                            **kwargs):
+    """Обновление поиска у рецептов с переименованным ингредиентом."""
+    if not created:
+        Recipe.objects.filter(
+            recipe_ingredient__ingredient=instance
+        ).update_search_vector()
+
+
+def release_image(storage, name, variants):
+    """Удаление изображения, если на него больше не ссылается ни один рецепт.
+    Выполняется после фиксации транзакции. Недавно сохранённые файлы
+    могут принадлежать ещё не зафиксированному рецепту, их удаляет gc_media."""
+    def release():
+        if name and not Recipe.objects.filter(image=name).exists():
+            for file_name in get_file_names(name, variants):
+                if not storage.is_recent(file_name):
+                    storage.delete(file_name)
+    transaction.on_commit(release)
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_previous_image(sender, instance, **kwargs):
+    """Запоминание прежнего изображения перед изменением рецепта."""
+    instance.previous_image = Recipe.objects.filter(
+        pk=instance.pk
+    ).values_list('image', 'image_variants').first()
+
+
+@receiver(post_save, sender=Recipe)
+def release_previous_image(sender, instance, **kwargs):
+    """Освобождение заменённого изображения."""
+    previous = getattr(instance, 'previous_image', None)
+    if previous and previous[0] != instance.image.name:
+        release_image(instance.image.storage, *previous)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_deleted_recipe_image(sender, instance, **kwargs):
+    """Освобождение изображения удалённого рецепта."""
+    release_image(
+        instance.image.storage, instance.image.name, instance.image_variants
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    """Добавление нового рецепта в ленты подписчиков автора."""
+    if created:
+        transaction.on_commit(lambda: feed.fan_out(instance))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, **kwargs):
+    """Заполнение ленты последними рецептами нового автора."""
+    if created:
+        feed.backfill(instance.user_id, [instance.following_id])
+
+
+@receiver(post_delete, sender=Follow)
+def trim_feed(sender, instance, **kwargs):
+    """Удаление из ленты рецептов автора после отписки."""
+    feed.trim(instance.user_id, [instance.following_id])
@@ -0,0 +1,56 @@
+import hashlib
+import os
+import time
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+# Файлы моложе этого срока не удаляются: запись, которая на них
+# ссылается, может быть ещё не зафиксирована.
+MEDIA_GRACE_SECONDS = 60 * 60
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, которое называет файлы по хешу содержимого.
+
+    Файл сохраняется в каталог исходного имени под именем
+    sha256 содержимого, одинаковые файлы хранятся один раз.
+    Повторное сохранение обновляет время изменения файла, чтобы
+    его не удалили в течение MEDIA_GRACE_SECONDS.
+    """
+    def get_content_name(self, name, content):
+        hasher = hashlib.sha256()
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        directory, file_name = os.path.split(name)
+        extension = os.path.splitext(file_name)[1].lower()
+        return os.path.join(
+            directory, f'{hasher.hexdigest()}{extension}'
+        ).replace('\\', '/')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        return self._save(name, content)
+
+    def is_recent(self, name, grace=MEDIA_GRACE_SECONDS):
+        """Файл сохранён или переиспользован не раньше grace секунд назад."""
+        try:
+            modified = os.path.getmtime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return modified > time.time() - grace
+
+
+def get_file_names(name, variants):
+    """Имя изображения и всех его уменьшенных копий."""
+    names = [name] if name else []
+    for widths in (variants or {}).values():
+        names.extend(widths.values())
+    return names
@@ -1,4 +1,4 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 from django.core.validators import RegexValidator
 
@@ -7,6 +7,23 @@ REGEX_SIGNS = RegexValidator(r'^[\w.@+-]+\Z', 'Поддерживаемые си
 REGEX_ME = RegexValidator(r'[^m][^e]', 'Имя пользователя не может быть "me".')
 
 
+class UserQuerySet(models.QuerySet):
+    """Кастомный QuerySet для модели пользователей."""
+    def with_subscription_status(self, user):
+        return self.annotate(
+            is_subscribed=models.Exists(
+                Follow.objects.filter(
+                    user=user,
+                    following=models.OuterRef('pk')
+                )
+            )
+        )
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):
+    """Менеджер пользователей с кастомным QuerySet."""
+
+
 class User(AbstractUser):
     """Модель пользователей."""
     username = models.CharField(
@@ -34,6 +51,7 @@ class User(AbstractUser):
     )
     REQUIRED_FIELDS = ['first_name', 'last_name', 'username']
     USERNAME_FIELD = 'email'
+    objects = CustomUserManager()
 
     class Meta:
         ordering = ('id',)